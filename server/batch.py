@@ -0,0 +1,117 @@
+"""Solving of many grids at once, spread over a pool of worker processes."""
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+from sudoku import Sudoku
+
+DEFAULT_CHUNK_SIZE = 64
+
+# index is the position of the grid in the input, solution is None for a grid without solution and summary is the
+# change_summary() of the solve (None for a grid which could not be loaded)
+BatchResult = namedtuple('BatchResult', ['index', 'grid', 'solution', 'summary'])
+# count is the number of solutions of the grid, at most the limit given to count_many() (0 for a grid which could not
+# be loaded)
+CountResult = namedtuple('CountResult', ['index', 'grid', 'count'])
+
+
+def solve_grid(index: int, grid: str) -> BatchResult:
+    s = Sudoku(history=False)
+    try:
+        s.load_grid_string(grid)
+    except ValueError:
+        return BatchResult(index, grid, None, None)
+    s.solve()
+    solution = s.grid_string() if s.solved() else None
+    return BatchResult(index, grid, solution, s.change_summary())
+
+
+def count_grid(index: int, grid: str, limit: int = 2) -> CountResult:
+    s = Sudoku(history=False)
+    try:
+        s.load_grid_string(grid)
+    except ValueError:
+        return CountResult(index, grid, 0)
+    return CountResult(index, grid, s.count_solutions(limit))
+
+
+def _solve_chunk(chunk: List[Tuple[int, str]]) -> List[BatchResult]:
+    return [solve_grid(index, grid) for index, grid in chunk]
+
+
+def _count_chunk(chunk: List[Tuple[int, str]], limit: int) -> List[CountResult]:
+    return [count_grid(index, grid, limit) for index, grid in chunk]
+
+
+def _chunks(items: Iterable, chunk_size: int) -> Iterator[List[Tuple[int, Any]]]:
+    numbered = enumerate(items)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_many(grids: Iterable[str], workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               ordered: bool = True, max_pending: int = None) -> Iterator[BatchResult]:
+    """Solves grids in the format of Sudoku.load_grid_string(), and yields a BatchResult for each.
+
+    Grids are sent to the workers by chunks of chunk_size. The input is consumed lazily: at most max_pending chunks
+    (twice the number of workers by default) are in flight, so memory stays flat on long inputs. With ordered=False,
+    results are yielded as soon as their chunk is complete. With workers=0, grids are solved in the calling process."""
+    return map_chunks(_solve_chunk, grids, workers, chunk_size, ordered, max_pending)
+
+
+def count_many(grids: Iterable[str], limit: int = 2, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               ordered: bool = True, max_pending: int = None) -> Iterator[CountResult]:
+    """Counts the solutions of grids, up to limit, and yields a CountResult for each. Grids are spread over the
+    workers as by solve_many()."""
+    if limit < 1:
+        raise ValueError('Limit must be at least 1')
+    return map_chunks(partial(_count_chunk, limit=limit), grids, workers, chunk_size, ordered, max_pending)
+
+
+def map_chunks(function: Callable[[List[Tuple[int, Any]]], list], items: Iterable, workers: int = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, ordered: bool = True, max_pending: int = None) -> Iterator:
+    """Yields the results of function called on chunks of (index, item) pairs of items, spread over the workers as by
+    solve_many(). function returns a list of results per chunk, and must be picklable (a module-level function or a
+    partial of one).
+
+    Arguments are checked when called, not once the results are iterated."""
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be at least 1')
+    if max_pending is not None and max_pending < 1:
+        raise ValueError('Max pending must be at least 1')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        return (result for chunk in _chunks(items, chunk_size) for result in function(chunk))
+    if max_pending is None:
+        max_pending = 2 * workers
+    return _map_pool(function, items, workers, chunk_size, ordered, max_pending)
+
+
+def _map_pool(function: Callable[[List[Tuple[int, Any]]], list], items: Iterable, workers: int, chunk_size: int,
+              ordered: bool, max_pending: int) -> Iterator:
+    chunks = _chunks(items, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            pending = deque(executor.submit(function, chunk) for chunk in islice(chunks, max_pending))
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                for future in done:
+                    # Keep the pool busy before handing results to the caller
+                    for chunk in islice(chunks, 1):
+                        pending.append(executor.submit(function, chunk))
+                    yield from future.result()
+        finally:
+            # A caller closing the generator early does not wait for the chunks not started yet
+            executor.shutdown(wait=True, cancel_futures=True)
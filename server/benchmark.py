@@ -0,0 +1,261 @@
+"""Benchmark of the solver on the difficulty buckets of data.grids and on large generated corpora.
+
+Reports puzzles/s and latency percentiles of solve(), of each _check_* strategy and of exclusive_sub_list, plus the
+memory allocated by solve(). Results are written as JSON, and can be compared against a saved baseline:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json --tolerance 0.15
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+import sudoku
+from cli import read_grids
+from data import grids, Difficulty
+from sudoku import Sudoku
+from utils import exclusive_sub_list
+
+DEFAULT_CORPUS_SIZE = 2000
+DEFAULT_TOLERANCE = 0.15
+
+# Strategies timed on their own: those of Sudoku.next_hint()
+TIMED_STRATEGIES = ('_check_cell_singleton',) + sudoku.STRATEGIES
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of values (fraction between 0 and 1)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """Summarizes a list of latencies in seconds. Latencies are reported in microseconds."""
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'total_s': total,
+        'per_second': len(latencies) / total if total > 0 else 0.0,
+        'mean_us': total / len(latencies) * 1e6 if latencies else 0.0,
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def transform_grid(grid: str, rnd: random.Random) -> str:
+    """Returns an equivalent grid: random digit relabelling, band/row/stack/column permutations and transposition."""
+    rows = [grid[r * 9:(r + 1) * 9] for r in range(9)]
+    if rnd.random() < 0.5:
+        rows = [''.join(column) for column in zip(*rows)]
+    row_order = [band * 3 + r for band in rnd.sample(range(3), 3) for r in rnd.sample(range(3), 3)]
+    column_order = [stack * 3 + c for stack in rnd.sample(range(3), 3) for c in rnd.sample(range(3), 3)]
+    labels = dict(zip('123456789', rnd.sample('123456789', 9)))
+    labels[' '] = ' '
+    return ''.join(labels[rows[r][c]] for r in row_order for c in column_order)
+
+
+def generated_corpus(size: int, seed: int = 0) -> List[str]:
+    """Returns size grids obtained by transforming the grids of data.grids."""
+    rnd = random.Random(seed)
+    sources = [grids[index]['grid'] for index in sorted(grids)]
+    return [transform_grid(rnd.choice(sources), rnd) for _ in range(size)]
+
+
+def difficulty_buckets() -> Dict[str, List[str]]:
+    buckets = {}
+    for difficulty in Difficulty:
+        bucket = [grids[index]['grid'] for index in sorted(grids) if grids[index]['difficulty'] == difficulty]
+        if bucket:
+            buckets[difficulty.name] = bucket
+    return buckets
+
+
+def bench_solve(bucket: List[str], repeat: int = 1) -> Dict[str, float]:
+    latencies = []
+    for _ in range(repeat):
+        for grid in bucket:
+            start = time.perf_counter()
+            s = Sudoku()
+            s.load_grid_string(grid)
+            s.solve()
+            latencies.append(time.perf_counter() - start)
+    return latency_stats(latencies)
+
+
+def bench_strategies(bucket: List[str]) -> Dict[str, Dict[str, float]]:
+    """Times every call of each _check_* strategy during solve(). hits counts the calls which found a change."""
+    latencies = {name: [] for name in TIMED_STRATEGIES}
+    hits = {name: 0 for name in TIMED_STRATEGIES}
+
+    def timed(name, method):
+        def call():
+            start = time.perf_counter()
+            change = method()
+            latencies[name].append(time.perf_counter() - start)
+            if change is not None:
+                hits[name] += 1
+            return change
+        return call
+
+    for grid in bucket:
+        s = Sudoku()
+        s.load_grid_string(grid)
+        for name in TIMED_STRATEGIES:
+            setattr(s, name, timed(name, getattr(s, name)))
+        s.solve()
+    stats = {}
+    for name in TIMED_STRATEGIES:
+        stats[name] = latency_stats(latencies[name])
+        stats[name]['hits'] = hits[name]
+    return stats
+
+
+@contextmanager
+def _recording_sub_lists(calls: List[List[List[int]]]):
+    def recording(containers_list):
+        calls.append(containers_list)
+        return exclusive_sub_list(containers_list)
+
+    sudoku.exclusive_sub_list = recording
+    try:
+        yield
+    finally:
+        sudoku.exclusive_sub_list = exclusive_sub_list
+
+
+def bench_exclusive_sub_list(bucket: List[str]) -> Dict[str, float]:
+    """Times exclusive_sub_list on the inputs it receives while solving the bucket."""
+    calls = []
+    with _recording_sub_lists(calls):
+        for grid in bucket:
+            s = Sudoku()
+            s.load_grid_string(grid)
+            s.solve()
+    latencies = []
+    for containers_list in calls:
+        start = time.perf_counter()
+        exclusive_sub_list(containers_list)
+        latencies.append(time.perf_counter() - start)
+    return latency_stats(latencies)
+
+
+def bench_allocations(bucket: List[str]) -> Dict[str, float]:
+    """Measures the memory allocated by loading and solving each grid of the bucket."""
+    peaks = []
+    allocated = []
+    for grid in bucket:
+        # Restart tracing for each grid, to reset the peak
+        tracemalloc.start()
+        try:
+            s = Sudoku()
+            s.load_grid_string(grid)
+            s.solve()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        allocated.append(current)
+        peaks.append(peak)
+    return {
+        'retained_bytes_mean': sum(allocated) / len(allocated) if allocated else 0.0,
+        'peak_bytes_mean': sum(peaks) / len(peaks) if peaks else 0.0,
+        'peak_bytes_max': max(peaks) if peaks else 0,
+    }
+
+
+def run_benchmark(buckets: Dict[str, List[str]], repeat: int = 1) -> Dict[str, object]:
+    results = {}
+    for name, bucket in buckets.items():
+        results[name] = {
+            'puzzles': len(bucket),
+            'solve': bench_solve(bucket, repeat),
+            'strategies': bench_strategies(bucket),
+            'exclusive_sub_list': bench_exclusive_sub_list(bucket),
+            'allocations': bench_allocations(bucket),
+        }
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'buckets': results,
+    }
+
+
+def compare(results: Dict[str, object], baseline: Dict[str, object],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Returns a description of each regression of results against baseline.
+
+    A regression is a drop of solve() puzzles/s, or a rise of solve() p99 latency or of peak allocations, by more than
+    tolerance (a fraction of the baseline value). Buckets missing from either side are ignored."""
+    regressions = []
+    for name, bucket in results['buckets'].items():
+        reference = baseline['buckets'].get(name)
+        if reference is None:
+            continue
+        checks = [
+            ('solve per_second', bucket['solve']['per_second'], reference['solve']['per_second'], -1),
+            ('solve p99_us', bucket['solve']['p99_us'], reference['solve']['p99_us'], 1),
+            ('peak_bytes_mean', bucket['allocations']['peak_bytes_mean'],
+             reference['allocations']['peak_bytes_mean'], 1),
+        ]
+        for metric, value, reference_value, direction in checks:
+            if reference_value > 0 and direction * (value - reference_value) > tolerance * reference_value:
+                regressions.append(f'{name} {metric}: {value:.1f} vs {reference_value:.1f} in baseline')
+    return regressions
+
+
+def _print_summary(results: Dict[str, object], output):
+    for name, bucket in results['buckets'].items():
+        solve = bucket['solve']
+        output.write(
+            f"{name:<12} {bucket['puzzles']:>6} puzzles {solve['per_second']:>9.1f}/s "
+            f"p50 {solve['p50_us']:>9.1f} us p99 {solve['p99_us']:>9.1f} us "
+            f"peak {bucket['allocations']['peak_bytes_mean'] / 1024:>7.1f} KiB\n"
+        )
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the Sudoku solver.')
+    parser.add_argument('--corpus-size', type=int, default=DEFAULT_CORPUS_SIZE,
+                        help=f'number of generated grids (default: {DEFAULT_CORPUS_SIZE}, 0 to skip)')
+    parser.add_argument('--corpus', help='additional corpus file, one 81-character puzzle per line')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated corpus')
+    parser.add_argument('--repeat', type=int, default=20, help='solves of each difficulty bucket grid (default: 20)')
+    parser.add_argument('-o', '--output', help='file to write the JSON results to')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'allowed relative regression (default: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(difficulty_buckets(), args.repeat)
+    corpora = {}
+    if args.corpus_size > 0:
+        corpora['generated'] = generated_corpus(args.corpus_size, args.seed)
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpora['corpus'] = [grid for grid in read_grids(f) if grid.strip()]
+    results['buckets'].update(run_benchmark(corpora)['buckets'])
+
+    _print_summary(results, sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            sys.stdout.write(f'REGRESSION {regression}\n')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
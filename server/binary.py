@@ -0,0 +1,257 @@
+"""Compact binary format of grids, candidates and change logs.
+
+- Cells: two cells per byte, 0 for an empty cell (41 bytes for a 9x9 grid). Grids of 16x16 cells or more take one
+  byte per cell.
+- Candidates: the masks of Sudoku._candidates in native byte order, as array.tobytes() (162 bytes for a 9x9 grid).
+- Changes: one packed record per Change: its type, the number of options removed and its data. Integers are written
+  on as few bytes as they need, and the keys of the data are numbered. Cell definitions, the most frequent changes,
+  have a fixed layout without keys (5 bytes for a DEFINE).
+- State: a whole Sudoku, as a header followed by its cells, candidates, undo trail and change history.
+
+Readers take any buffer (bytes, mmap, memoryview...) and work on memoryview slices of it: candidates_view() and
+iter_changes() read the buffer in place, without copying it."""
+from array import array
+from heapq import heapify
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from constants import ChangeType
+from sudoku import _trail_typecode, Change, Sudoku
+
+MAGIC = b'SDK'
+VERSION = 1
+
+# Keys of Change.data, numbered by their position
+_KEYS = (
+    'row', 'column', 'value', 'unit', 'square', 'exclusive row', 'exclusive column', 'exclusive square', 'sub_set',
+    'removed', 'rows', 'columns', 'pivot', 'pincers', 'nodes',
+)
+_KEY_CODES = {key: code for code, key in enumerate(_KEYS)}
+# String values of Change.data (unit kinds), numbered by their position
+_STRINGS = ('row', 'column', 'square')
+_STRING_CODES = {string: code for code, string in enumerate(_STRINGS)}
+
+# Tags of the values of Change.data
+_INT = 0
+_STR = 1
+_TUPLE = 2
+_LIST = 3
+_SET = 4
+
+_CHANGE_TYPES = {change_type.value: change_type for change_type in ChangeType}
+
+# Cell definitions, the most frequent changes, always have the same keys: their records hold the number of options
+# removed, the row, the column and the value, one byte each (and the unit kind of a hidden single)
+_LAYOUTS = {ChangeType.DEFINE, ChangeType.CELL_SINGLETON, ChangeType.HIDDEN_SINGLE}
+
+
+def _write_varint(out: bytearray, value: int):
+    """Writes a non-negative integer 7 bits per byte, lowest bits first."""
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buffer: memoryview, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def pack_cells(cells: Sequence[Optional[int]]) -> bytes:
+    """Packs cell values (None for an empty cell), two per byte when they are below 16."""
+    values = [0 if value is None else value for value in cells]
+    if len(values) >= 256:
+        return bytes(values)
+    if len(values) % 2:
+        values.append(0)
+    return bytes(values[i] << 4 | values[i + 1] for i in range(0, len(values), 2))
+
+
+def unpack_cells(buffer, count: int = 81) -> List[Optional[int]]:
+    """Returns the values of the count cells packed at the start of buffer by pack_cells()."""
+    data = memoryview(buffer)
+    if count >= 256:
+        return [value or None for value in data[:count]]
+    cells = []
+    for byte in data[:(count + 1) // 2]:
+        cells.append(byte >> 4 or None)
+        cells.append(byte & 0xf or None)
+    return cells[:count]
+
+
+def cells_size(count: int) -> int:
+    """Returns the number of bytes of count cells packed by pack_cells()."""
+    return count if count >= 256 else (count + 1) // 2
+
+
+def pack_candidates(candidates: array) -> bytes:
+    return candidates.tobytes()
+
+
+def candidates_view(buffer, count: int = 81, typecode: str = 'H') -> memoryview:
+    """Returns the count candidates' masks at the start of buffer, read in place."""
+    return memoryview(buffer)[:count * array(typecode).itemsize].cast(typecode)
+
+
+def _write_value(out: bytearray, value):
+    if isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, value)
+    elif isinstance(value, str):
+        out.append(_STR)
+        out.append(_STRING_CODES[value])
+    else:
+        if isinstance(value, tuple):
+            out.append(_TUPLE)
+        elif isinstance(value, list):
+            out.append(_LIST)
+        elif isinstance(value, (set, frozenset)):
+            out.append(_SET)
+            value = sorted(value)
+        else:
+            raise ValueError(f'Cannot pack {type(value).__name__} values')
+        _write_varint(out, len(value))
+        for item in value:
+            _write_value(out, item)
+
+
+def _read_value(buffer: memoryview, offset: int):
+    tag = buffer[offset]
+    offset += 1
+    if tag == _INT:
+        return _read_varint(buffer, offset)
+    if tag == _STR:
+        return _STRINGS[buffer[offset]], offset + 1
+    length, offset = _read_varint(buffer, offset)
+    items = []
+    for _ in range(length):
+        item, offset = _read_value(buffer, offset)
+        items.append(item)
+    if tag == _TUPLE:
+        return tuple(items), offset
+    if tag == _SET:
+        return set(items), offset
+    return items, offset
+
+
+def pack_change(change: Change, out: bytearray = None) -> bytearray:
+    """Appends the packed record of a change to out (a new bytearray by default), and returns out."""
+    if out is None:
+        out = bytearray()
+    out.append(change.type.value)
+    data = change.data
+    if change.type in _LAYOUTS:
+        out += bytes((change.removed, data['row'], data['column'], data['value']))
+        if change.type == ChangeType.HIDDEN_SINGLE:
+            out.append(_STRING_CODES[data['unit']])
+        return out
+    _write_varint(out, change.removed)
+    out.append(len(data))
+    for key, value in data.items():
+        out.append(_KEY_CODES[key])
+        _write_value(out, value)
+    return out
+
+
+def unpack_change(buffer, offset: int = 0) -> Tuple[Change, int]:
+    """Reads the change packed at offset in buffer. Returns it and the offset of the next record."""
+    data = memoryview(buffer)
+    change_type = _CHANGE_TYPES[data[offset]]
+    if change_type in _LAYOUTS:
+        removed, row, column, value = data[offset + 1:offset + 5]
+        if change_type == ChangeType.HIDDEN_SINGLE:
+            values = {'row': row, 'column': column, 'value': value, 'unit': _STRINGS[data[offset + 5]]}
+            return Change(change_type, values, removed), offset + 6
+        return Change(change_type, {'row': row, 'column': column, 'value': value}, removed), offset + 5
+    removed, offset = _read_varint(data, offset + 1)
+    values = {}
+    nb_of_keys = data[offset]
+    offset += 1
+    for _ in range(nb_of_keys):
+        key = _KEYS[data[offset]]
+        values[key], offset = _read_value(data, offset + 1)
+    return Change(change_type, values, removed), offset
+
+
+def pack_changes(changes: Iterable[Change]) -> bytes:
+    out = bytearray()
+    for change in changes:
+        pack_change(change, out)
+    return bytes(out)
+
+
+def iter_changes(buffer, offset: int = 0, end: int = None) -> Iterator[Change]:
+    """Yields the changes packed by pack_changes() from offset to end (the end of buffer by default)."""
+    data = memoryview(buffer)
+    if end is None:
+        end = len(data)
+    while offset < end:
+        change, offset = unpack_change(data, offset)
+        yield change
+
+
+def dumps(s: Sudoku) -> bytes:
+    """Returns the state of a grid: cells, candidates, undo trail and change history. The work queues of the strategies
+    are not kept: loads() schedules every unit again."""
+    if s._log is not None:
+        raise ValueError('Cannot dump a grid without history')
+    size = s.SIZE
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    out.append(size)
+    out += pack_cells(s._cell)
+    out += pack_candidates(s._candidates)
+    trail = array(_trail_typecode(size), s._trail)
+    _write_varint(out, len(trail))
+    out += trail.tobytes()
+    # History nodes, oldest first, with the trail length of each
+    nodes = []
+    node = s._history
+    while node is not None:
+        nodes.append(node)
+        node = node[1]
+    _write_varint(out, len(nodes))
+    for change, _, trail_length in reversed(nodes):
+        _write_varint(out, trail_length)
+        pack_change(change, out)
+    return bytes(out)
+
+
+def loads(buffer) -> Sudoku:
+    """Returns a grid in the state written by dumps()."""
+    data = memoryview(buffer)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError('Not a Sudoku state')
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f'Unsupported version {data[len(MAGIC)]}')
+    size = data[len(MAGIC) + 1]
+    offset = len(MAGIC) + 2
+    s = Sudoku(size)
+    count = size * size
+    s._cell = unpack_cells(data[offset:], count)
+    offset += cells_size(count)
+    typecode = s._candidates.typecode
+    s._candidates = array(typecode, candidates_view(data[offset:], count, typecode))
+    offset += count * s._candidates.itemsize
+    length, offset = _read_varint(data, offset)
+    trail_typecode = _trail_typecode(size)
+    trail_size = length * array(trail_typecode).itemsize
+    s._trail = array(s._trail.typecode, data[offset:offset + trail_size].cast(trail_typecode))
+    offset += trail_size
+    nb_of_nodes, offset = _read_varint(data, offset)
+    history = None
+    for _ in range(nb_of_nodes):
+        trail_length, offset = _read_varint(data, offset)
+        change, offset = unpack_change(data, offset)
+        history = (change, history, trail_length)
+    s._history = history
+    s._singles = [index for index, mask in enumerate(s._candidates) if mask and not mask & (mask - 1)]
+    heapify(s._singles)
+    return s
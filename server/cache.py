@@ -0,0 +1,115 @@
+"""Persistent cache of solutions, keyed by the canonical form of grids.
+
+Equivalent grids (see canonical.py) share one entry: the solution is stored in the canonical orientation and labels,
+and mapped back to those of the grid asked for. Entries live in a sqlite file, and the least recently used ones are
+evicted beyond max_entries. Hits only read the file: their recency is kept in memory, and written in batches, before
+an eviction and on close()."""
+import sqlite3
+from typing import Dict, Optional
+
+from canonical import apply, canonical_transform, invert
+from sudoku import Sudoku
+
+DEFAULT_MAX_ENTRIES = 100000
+# Number of hits whose recency is kept in memory before being written
+FLUSH_SIZE = 1024
+
+
+class SolutionCache:
+    def __init__(self, path: str = ':memory:', max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError('Cache must hold at least 1 entry')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        # Commits of a write-ahead log do not wait for the disk, and reads do not wait for writes
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS solutions '
+            '(grid TEXT PRIMARY KEY, solution TEXT NOT NULL, used INTEGER NOT NULL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+        # Access counter ordering entries from the least to the most recently used
+        self._clock = self._connection.execute('SELECT COALESCE(MAX(used), 0) FROM solutions').fetchone()[0]
+        # Access counter of the entries hit since the last flush, by canonical grid, and number of these hits
+        self._used: Dict[str, int] = {}
+        self._unflushed = 0
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._flush()
+        self._connection.close()
+
+    def _flush(self):
+        """Writes the recency of the entries hit since the last flush."""
+        if self._used:
+            with self._connection:
+                self._connection.executemany(
+                    'UPDATE solutions SET used = ? WHERE grid = ?', [(used, grid) for grid, used in self._used.items()]
+                )
+            self._used = {}
+            self._unflushed = 0
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, grid: str) -> Optional[str]:
+        """Returns the cached solution of a grid in the format of Sudoku.load_grid_string(), or None."""
+        canonical, transform = canonical_transform(grid)
+        return self._get(canonical, transform)
+
+    def _get(self, canonical, transform) -> Optional[str]:
+        row = self._connection.execute('SELECT solution FROM solutions WHERE grid = ?', (canonical,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used[canonical] = self._tick()
+        self._unflushed += 1
+        if self._unflushed >= FLUSH_SIZE:
+            self._flush()
+        return invert(row[0], transform)
+
+    def put(self, grid: str, solution: str):
+        canonical, transform = canonical_transform(grid)
+        self._put(canonical, apply(solution, transform))
+
+    def _put(self, canonical, canonical_solution):
+        # Evictions go by the recency of every hit
+        self._flush()
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO solutions (grid, solution, used) VALUES (?, ?, ?)',
+                (canonical, canonical_solution, self._tick())
+            )
+            self._connection.execute(
+                'DELETE FROM solutions WHERE used <= (SELECT used FROM solutions ORDER BY used DESC LIMIT 1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def solve(self, grid: str) -> Optional[str]:
+        """Returns the solution of a grid, from the cache or else from Sudoku.solve(). Returns None for a grid without
+        solution (which is not cached), and raises ValueError for a grid which cannot be loaded."""
+        canonical, transform = canonical_transform(grid)
+        solution = self._get(canonical, transform)
+        if solution is not None:
+            return solution
+        # Solving the canonical grid gives its solution as stored
+        s = Sudoku(history=False)
+        s.load_grid_string(canonical)
+        s.solve()
+        if not s.solved():
+            return None
+        self._put(canonical, s.grid_string())
+        return invert(s.grid_string(), transform)
@@ -0,0 +1,220 @@
+"""Canonical form of grids under the symmetries of Sudoku.
+
+Two grids are equivalent when one is obtained from the other by relabelling the values, permuting the bands, the rows
+within a band, the stacks and the columns within a stack, and transposing. The canonical form of a grid is the
+smallest of its equivalent grids, reading rows in order, with an empty cell lower than any value and values relabelled
+1, 2, 3... in order of first appearance.
+
+The canonical form is built one row at a time. A partial candidate fixes the rows placed so far, the order of the
+stacks and an ordered partition of the columns of each stack: columns in the same part are not told apart by the
+rows placed so far, so their order is still free. Placing a row sorts the columns of each part by their relabelled
+value. Only the candidates giving the smallest row are kept, and only those are split by the order given to the
+values first seen in the row."""
+from collections import namedtuple
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import permutations
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from tables import UNITS
+
+SIZE = 9
+BLOCK = 3
+_EMPTY = ' '
+_VALUES = set('123456789 ')
+_NEW = SIZE + 1
+
+# How a grid maps to its canonical form: canonical[i][j] = labels[grid'[rows[i]][columns[j]]], with grid' the grid
+# transposed if transposed is True
+Transform = namedtuple('Transform', ['transposed', 'rows', 'columns', 'labels'])
+
+_STACK_ORDERS = list(permutations(range(BLOCK)))
+
+
+def _rows(grid: str, transposed: bool) -> List[str]:
+    if transposed:
+        return [grid[column::SIZE] for column in range(SIZE)]
+    return [grid[row * SIZE:(row + 1) * SIZE] for row in range(SIZE)]
+
+
+@lru_cache(maxsize=None)
+def _next_rows(rows: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Rows which may be placed after rows: any row of an unused band when a band is complete, otherwise the other
+    rows of the current band."""
+    if len(rows) % BLOCK == 0:
+        used = {row // BLOCK for row in rows}
+        return tuple(row for row in range(SIZE) if row // BLOCK not in used)
+    band = rows[-1] // BLOCK
+    return tuple(row for row in range(band * BLOCK, (band + 1) * BLOCK) if row not in rows)
+
+
+def _place(row: str, parts: Tuple[Tuple[int, ...], ...], labels: Dict[str, int]):
+    """Returns the smallest relabelled row for an ordered partition of columns, the refined partition giving it, and
+    the values new to labels as a list of (part position, columns). New values of a part may come in any order:
+    _orders() gives the partition and labelling of each order."""
+    # Relabelled value of each column: 0 when empty, _NEW when not labelled yet
+    values = [0 if value == _EMPTY else labels.get(value, _NEW) for value in row]
+    key = []
+    refined = []
+    new_values = []
+    next_label = len(labels) + 1
+    for part in parts:
+        if len(part) == 1:
+            value = values[part[0]]
+            if value == _NEW:
+                new_values.append((len(refined), part))
+                value = next_label
+                next_label += 1
+            key.append(value)
+            refined.append(part)
+            continue
+        ordered = sorted(part, key=values.__getitem__)
+        start = 0
+        while start < len(ordered):
+            value = values[ordered[start]]
+            end = start + 1
+            if value == 0 or value == _NEW:
+                while end < len(ordered) and values[ordered[end]] == value:
+                    end += 1
+            if value == _NEW:
+                new_values.append((len(refined), tuple(ordered[start:end])))
+                key.extend(range(next_label, next_label + end - start))
+                next_label += end - start
+            else:
+                key.extend([value] * (end - start))
+            refined.append(tuple(ordered[start:end]))
+            start = end
+    return tuple(key), refined, new_values
+
+
+def _orders(row, refined, labels, new_values):
+    if not new_values:
+        yield tuple(refined), labels
+        return
+    # Every order of the new values of each part: the relabelled row is the same, the labelling is not
+    orders = [[]]
+    for position, columns in new_values:
+        orders = [order + [(position, columns_order)] for order in orders for columns_order in permutations(columns)]
+    for order in orders:
+        parts = list(refined)
+        new_labels = dict(labels)
+        shift = 0
+        for position, columns_order in order:
+            parts[position + shift:position + shift + 1] = [(column,) for column in columns_order]
+            shift += len(columns_order) - 1
+            for column in columns_order:
+                new_labels[row[column]] = len(new_labels) + 1
+        yield tuple(parts), new_labels
+
+
+def _first_rows(grid: str) -> list:
+    """Places the first row. All its values are new, so the relabelled row only depends on where its empty cells
+    are: the smallest puts the stacks with the most empty cells first, and the empty cells first in each stack."""
+    best = None
+    kept = []
+    for transposed in (False, True):
+        grid_rows = _rows(grid, transposed)
+        for row, values in enumerate(grid_rows):
+            empty = [values[stack * BLOCK:(stack + 1) * BLOCK].count(_EMPTY) for stack in range(BLOCK)]
+            pattern = sorted(empty, reverse=True)
+            if best is None or pattern > best:
+                best = pattern
+                kept = []
+            if pattern == best:
+                for stacks in _STACK_ORDERS:
+                    if [empty[stack] for stack in stacks] == pattern:
+                        parts = tuple(tuple(range(stack * BLOCK, (stack + 1) * BLOCK)) for stack in stacks)
+                        key, refined, new_values = _place(values, parts, {})
+                        kept.append((grid_rows, transposed, (row,), refined, {}, new_values, key))
+    return kept
+
+
+def canonical_transform(grid: str) -> Tuple[str, Transform]:
+    """Returns the canonical form of a grid in the format of Sudoku.load_grid_string(), and a transform mapping the
+    grid to it."""
+    if len(grid) != SIZE * SIZE:
+        raise ValueError('Grid must have 81 cells')
+    if not set(grid) <= _VALUES:
+        raise ValueError('Value out of range')
+    for unit in UNITS:
+        values = [grid[index] for index in unit if grid[index] != _EMPTY]
+        if len(set(values)) != len(values):
+            raise ValueError('Value not compatible with other cells')
+    # Candidates: (rows of the grid, transposed, placed rows, refined column parts, labels, new values to order)
+    kept = _first_rows(grid)
+    canonical_rows = [kept[0][-1]]
+    for _ in range(1, SIZE):
+        # Only the candidates giving the smallest row are expanded
+        candidates = [
+            (grid_rows, transposed, rows, parts, new_labels)
+            for grid_rows, transposed, rows, refined, labels, new_values, _ in kept
+            for parts, new_labels in _orders(grid_rows[rows[-1]], refined, labels, new_values)
+        ]
+        best = None
+        kept = []
+        for grid_rows, transposed, rows, parts, labels in candidates:
+            for row in _next_rows(rows):
+                key, refined, new_values = _place(grid_rows[row], parts, labels)
+                if best is None or key < best:
+                    best = key
+                    kept = []
+                if key == best:
+                    kept.append((grid_rows, transposed, rows + (row,), refined, labels, new_values, key))
+        canonical_rows.append(best)
+    grid_rows, transposed, rows, refined, labels, new_values, _ = kept[0]
+    parts, labels = next(_orders(grid_rows[rows[-1]], refined, labels, new_values))
+    columns = tuple(column for part in parts for column in part)
+    # Values missing from the grid take the labels left, in increasing order
+    for value in '123456789':
+        if value not in labels:
+            labels[value] = len(labels) + 1
+    canonical = ''.join(_EMPTY if label == 0 else str(label) for key in canonical_rows for label in key)
+    return canonical, Transform(transposed, rows, columns, labels)
+
+
+def canonical_form(grid: str) -> str:
+    return canonical_transform(grid)[0]
+
+
+def canonical_hash(grid: str) -> str:
+    """Returns a hash of the canonical form of a grid, the same for all equivalent grids and across runs."""
+    return blake2b(canonical_form(grid).encode('ascii'), digest_size=16).hexdigest()
+
+
+def equivalent(grid: str, other: str) -> bool:
+    return canonical_form(grid) == canonical_form(other)
+
+
+def deduplicate(grids: Iterable[str]) -> Iterator[str]:
+    """Yields the first grid of each class of equivalent grids."""
+    seen = set()
+    for grid in grids:
+        key = canonical_hash(grid)
+        if key not in seen:
+            seen.add(key)
+            yield grid
+
+
+def apply(grid: str, transform: Transform) -> str:
+    """Maps a grid (or its solution) to the canonical orientation and labels of transform."""
+    grid_rows = _rows(grid, transform.transposed)
+    labels = transform.labels
+    return ''.join(
+        _EMPTY if value == _EMPTY else str(labels[value])
+        for value in (grid_rows[row][column] for row in transform.rows for column in transform.columns)
+    )
+
+
+def invert(canonical: str, transform: Transform) -> str:
+    """Maps a grid in the canonical orientation and labels of transform back to the original ones."""
+    values = {str(label): value for value, label in transform.labels.items()}
+    values[_EMPTY] = _EMPTY
+    cells = [_EMPTY] * (SIZE * SIZE)
+    for i, row in enumerate(transform.rows):
+        for j, column in enumerate(transform.columns):
+            value = values[canonical[i * SIZE + j]]
+            if transform.transposed:
+                cells[column * SIZE + row] = value
+            else:
+                cells[row * SIZE + column] = value
+    return ''.join(cells)
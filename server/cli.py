@@ -0,0 +1,107 @@
+"""Command-line solver streaming puzzles from a file or stdin.
+
+Each input line holds one puzzle of 81 characters in row-major order, with '.', '0' or a space for an empty cell.
+Anything after these 81 characters is ignored, such as the difficulty written by generator.py.
+Each output line holds the solution of the puzzle on the same input line. A puzzle which cannot be solved is written
+back unchanged, and reported on stderr. With --count, each output line holds instead the number of solutions of the
+puzzle (up to --limit), and puzzles without a unique solution are reported."""
+import argparse
+import sys
+import time
+from typing import Iterable, Iterator, List, TextIO
+
+from batch import count_many, solve_many, DEFAULT_CHUNK_SIZE
+
+BLANKS = str.maketrans('.0', '  ')
+
+
+def read_grids(lines: Iterable[str]) -> Iterator[str]:
+    """Yields the grids of puzzle lines in the format of Sudoku.load_grid_string(), ignoring anything after the first
+    81 characters."""
+    for line in lines:
+        yield line.rstrip('\r\n')[:81].translate(BLANKS)
+
+
+def solve_stream(source: TextIO, destination: TextIO, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 report: TextIO = None) -> int:
+    """Solves the puzzles read from source and writes their solutions to destination.
+
+    Returns the number of puzzles which could not be solved."""
+    failures = 0
+    count = 0
+    start = time.perf_counter()
+    for result in solve_many(read_grids(source), workers=workers, chunk_size=chunk_size):
+        count += 1
+        if result.solution is None:
+            failures += 1
+            destination.write(result.grid.replace(' ', '.') + '\n')
+            if report is not None:
+                report.write(f'Line {result.index + 1}: no solution\n')
+        else:
+            destination.write(result.solution + '\n')
+    elapsed = time.perf_counter() - start
+    if report is not None:
+        rate = count / elapsed if elapsed > 0 else 0.0
+        report.write(
+            f'{count} puzzles in {elapsed:.3f} s ({rate:.1f} puzzles/s), {failures} without solution\n'
+        )
+    return failures
+
+
+def count_stream(source: TextIO, destination: TextIO, limit: int = 2, workers: int = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, report: TextIO = None) -> int:
+    """Counts the solutions of the puzzles read from source, up to limit, and writes the counts to destination.
+
+    Returns the number of puzzles without a unique solution."""
+    failures = 0
+    count = 0
+    start = time.perf_counter()
+    for result in count_many(read_grids(source), limit=limit, workers=workers, chunk_size=chunk_size):
+        count += 1
+        destination.write(f'{result.count}\n')
+        if result.count != 1:
+            failures += 1
+            if report is not None:
+                description = 'no solution' if result.count == 0 else 'several solutions'
+                report.write(f'Line {result.index + 1}: {description}\n')
+    elapsed = time.perf_counter() - start
+    if report is not None:
+        rate = count / elapsed if elapsed > 0 else 0.0
+        report.write(
+            f'{count} puzzles in {elapsed:.3f} s ({rate:.1f} puzzles/s), {failures} without a unique solution\n'
+        )
+    return failures
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Solve Sudoku puzzles, one 81-character puzzle per line.')
+    parser.add_argument('input', nargs='?', default='-', help='puzzle file, - for stdin (default)')
+    parser.add_argument('-o', '--output', default='-', help='solution file, - for stdout (default)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, 0 to solve in this process (default: one per core)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'puzzles sent to a worker at once (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--count', action='store_true', help='write the number of solutions instead of solving')
+    parser.add_argument('--limit', type=int, default=2,
+                        help='number of solutions at which --count stops searching (default: 2)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report failures and throughput')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    destination = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        report = None if args.quiet else sys.stderr
+        if args.count:
+            failures = count_stream(source, destination, args.limit, args.workers, args.chunk_size, report)
+        else:
+            failures = solve_stream(source, destination, args.workers, args.chunk_size, report)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if destination is not sys.stdout:
+            destination.close()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
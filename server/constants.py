@@ -4,8 +4,18 @@ from enum import Enum, auto
 class ChangeType(Enum):
     DEFINE = auto()
     CELL_SINGLETON = auto()
+    HIDDEN_SINGLE = auto()
     EXCLUSIVE_ROW_IN_SQUARE = auto()
     EXCLUSIVE_COLUMN_IN_SQUARE = auto()
+    EXCLUSIVE_SQUARE_IN_ROW = auto()
+    EXCLUSIVE_SQUARE_IN_COLUMN = auto()
+    HIDDEN_PAIR = auto()
+    HIDDEN_TRIPLE = auto()
     ROW_SUB_SET = auto()
     COLUMN_SUB_SET = auto()
     SQUARE_SUB_SET = auto()
+    X_WING = auto()
+    SWORDFISH = auto()
+    XY_WING = auto()
+    SIMPLE_COLORING = auto()
+    SEARCH = auto()
@@ -0,0 +1,183 @@
+"""On-disk corpus of puzzles, read through mmap.
+
+A corpus file holds a header, the puzzle ids in ascending order, the positions of the puzzles grouped by difficulty,
+the difficulty of each puzzle and finally the grids: fixed-width records of SIZE * SIZE characters (81 for a 9x9 grid)
+in the format of Sudoku.load_grid_string(), in the order of the ids. A puzzle is found by a binary search over the ids
+and read in place, so opening a corpus of millions of puzzles reads nothing but its header.
+
+    python corpus.py puzzles.txt -o puzzles.corpus
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from cli import BLANKS
+from data import Difficulty
+
+MAGIC = b'SDC'
+VERSION = 1
+
+# Magic, version, grid size and number of puzzles, then the number of puzzles of each difficulty (see _BUCKETS)
+_HEADER = struct.Struct('=3sBB3xQ')
+_COUNT = struct.Struct('=Q')
+# Difficulty codes: 0 for a puzzle without difficulty, Difficulty.value otherwise
+_BUCKETS = [None] + sorted(Difficulty, key=lambda difficulty: difficulty.value)
+_CODES = {difficulty: code for code, difficulty in enumerate(_BUCKETS)}
+_ID_TYPE = 'Q'
+_POSITION_TYPE = 'I'
+_DIFFICULTY_TYPE = 'B'
+
+# (id, grid, difficulty or None) of a puzzle, grid in the format of Sudoku.load_grid_string()
+CorpusEntry = Tuple[int, str, Optional[Difficulty]]
+
+
+def write_corpus(path: str, puzzles: Iterable[CorpusEntry], size: int = 9) -> int:
+    """Writes the puzzles to a corpus file. Returns the number of puzzles written."""
+    width = size * size
+    entries = sorted(puzzles, key=lambda entry: entry[0])
+    ids = array(_ID_TYPE, (entry[0] for entry in entries))
+    for previous, current in zip(ids, ids[1:]):
+        if previous == current:
+            raise ValueError(f'Duplicate puzzle id {current}')
+    codes = array(_DIFFICULTY_TYPE, (_CODES[entry[2]] for entry in entries))
+    buckets = [[] for _ in _BUCKETS]
+    for position, code in enumerate(codes):
+        buckets[code].append(position)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, size, len(entries)))
+        for bucket in buckets:
+            f.write(_COUNT.pack(len(bucket)))
+        f.write(ids.tobytes())
+        for bucket in buckets:
+            f.write(array(_POSITION_TYPE, bucket).tobytes())
+        f.write(codes.tobytes())
+        for puzzle_id, grid, _ in entries:
+            record = grid.encode('ascii')
+            if len(record) != width:
+                raise ValueError(f'Grid of puzzle {puzzle_id} must have {width} cells')
+            f.write(record)
+    return len(entries)
+
+
+class Corpus:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, count = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError('Not a puzzle corpus')
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f'Unsupported version {version}')
+        self._width = self.size * self.size
+        offset = _HEADER.size
+        self._bucket_starts = [0]
+        for _ in _BUCKETS:
+            self._bucket_starts.append(self._bucket_starts[-1] + _COUNT.unpack_from(self._mmap, offset)[0])
+            offset += _COUNT.size
+        self._views = []
+        self._ids, offset = self._section(offset, count, _ID_TYPE)
+        self._positions, offset = self._section(offset, count, _POSITION_TYPE)
+        self._codes, offset = self._section(offset, count, _DIFFICULTY_TYPE)
+        self._records = offset
+
+    def _section(self, offset: int, count: int, typecode: str) -> Tuple[memoryview, int]:
+        end = offset + count * array(typecode).itemsize
+        view = memoryview(self._mmap)[offset:end].cast(typecode)
+        self._views.append(view)
+        return view, end
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, puzzle_id: int) -> bool:
+        position = bisect_left(self._ids, puzzle_id)
+        return position < len(self._ids) and self._ids[position] == puzzle_id
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # The mmap cannot be closed while views on it remain
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def _position(self, puzzle_id: int) -> int:
+        position = bisect_left(self._ids, puzzle_id)
+        if position == len(self._ids) or self._ids[position] != puzzle_id:
+            raise KeyError(puzzle_id)
+        return position
+
+    def _grid_at(self, position: int) -> str:
+        start = self._records + position * self._width
+        return self._mmap[start:start + self._width].decode('ascii')
+
+    def grid(self, puzzle_id: int) -> str:
+        """Returns the grid of a puzzle in the format of Sudoku.load_grid_string(). Raises KeyError for an unknown
+        id."""
+        return self._grid_at(self._position(puzzle_id))
+
+    def difficulty(self, puzzle_id: int) -> Optional[Difficulty]:
+        return _BUCKETS[self._codes[self._position(puzzle_id)]]
+
+    def count(self, difficulty: Optional[Difficulty]) -> int:
+        """Returns the number of puzzles of a difficulty (None for the puzzles without one)."""
+        code = _CODES[difficulty]
+        return self._bucket_starts[code + 1] - self._bucket_starts[code]
+
+    def ids(self, difficulty: Optional[Difficulty]) -> Iterator[int]:
+        """Yields the ids of the puzzles of a difficulty (None for the puzzles without one), in ascending order."""
+        code = _CODES[difficulty]
+        for position in self._positions[self._bucket_starts[code]:self._bucket_starts[code + 1]]:
+            yield self._ids[position]
+
+    def id_at(self, difficulty: Optional[Difficulty], rank: int) -> int:
+        """Returns the id of the rank-th puzzle of a difficulty, in ascending order, e.g. to pick one at random."""
+        code = _CODES[difficulty]
+        if not 0 <= rank < self.count(difficulty):
+            raise IndexError(rank)
+        return self._ids[self._positions[self._bucket_starts[code] + rank]]
+
+
+def read_puzzles(lines: Iterable[str], size: int = 9) -> Iterator[CorpusEntry]:
+    """Yields the puzzles of lines holding a grid of size * size characters (with '.', '0' or a space for an empty
+    cell) and optionally the name of its difficulty, as written by generator.py. Ids are the line numbers, from 1."""
+    width = size * size
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if line:
+            name = line[width:].strip()
+            yield number, line[:width].translate(BLANKS), Difficulty[name] if name else None
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Build a puzzle corpus from a puzzle file, one puzzle per line.')
+    parser.add_argument('input', nargs='?', default='-', help='puzzle file, - for stdin (default)')
+    parser.add_argument('-o', '--output', required=True, help='corpus file')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    try:
+        count = write_corpus(args.output, read_puzzles(source))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f'{count} puzzles written to {args.output}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
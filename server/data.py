@@ -28,17 +28,37 @@ grids = {
             ChangeType.DEFINE:
                 {'count': 28, 'removed': 546},
             ChangeType.CELL_SINGLETON:
-                {'count': 53, 'removed': 168},
+                {'count': 37, 'removed': 111},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 16, 'removed': 71},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
-                {'count': 5, 'removed': 8},
+                {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
-                {'count': 2, 'removed': 3},
+                {'count': 1, 'removed': 1},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
-                {'count': 1, 'removed': 4},
+                {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 0, 'removed': 0},
         }
     },
     125602: {
@@ -58,16 +78,36 @@ grids = {
                 {'count': 36, 'removed': 602},
             ChangeType.CELL_SINGLETON:
                 {'count': 45, 'removed': 127},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
                 {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
                 {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 0, 'removed': 0},
         }
     },
     313921: {
@@ -86,17 +126,37 @@ grids = {
             ChangeType.DEFINE:
                 {'count': 25, 'removed': 514},
             ChangeType.CELL_SINGLETON:
-                {'count': 56, 'removed': 179},
+                {'count': 44, 'removed': 147},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 12, 'removed': 68},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
-                {'count': 4, 'removed': 9},
+                {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
-                {'count': 8, 'removed': 18},
+                {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
-                {'count': 2, 'removed': 9},
+                {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 0, 'removed': 0},
         }
     },
 
@@ -117,16 +177,36 @@ grids = {
                 {'count': 29, 'removed': 566},
             ChangeType.CELL_SINGLETON:
                 {'count': 52, 'removed': 163},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
                 {'count': 0, 'removed': 0},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
                 {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 0, 'removed': 0},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 0, 'removed': 0},
         }
     },
 
@@ -146,17 +226,37 @@ grids = {
             ChangeType.DEFINE:
                 {'count': 26, 'removed': 539},
             ChangeType.CELL_SINGLETON:
-                {'count': 55, 'removed': 127},
+                {'count': 39, 'removed': 95},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 16, 'removed': 79},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
-                {'count': 15, 'removed': 25},
+                {'count': 3, 'removed': 6},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
-                {'count': 8, 'removed': 13},
+                {'count': 1, 'removed': 3},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 1, 'removed': 4},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 1, 'removed': 3},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
-                {'count': 10, 'removed': 25},
+                {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 0, 'removed': 0},
         }
     },
 
@@ -176,17 +276,37 @@ grids = {
             ChangeType.DEFINE:
                 {'count': 24, 'removed': 509},
             ChangeType.CELL_SINGLETON:
-                {'count': 20, 'removed': 81},
+                {'count': 11, 'removed': 64},
+            ChangeType.HIDDEN_SINGLE:
+                {'count': 9, 'removed': 49},
             ChangeType.EXCLUSIVE_ROW_IN_SQUARE:
-                {'count': 5, 'removed': 17},
+                {'count': 1, 'removed': 2},
             ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE:
-                {'count': 5, 'removed': 9},
+                {'count': 2, 'removed': 3},
+            ChangeType.EXCLUSIVE_SQUARE_IN_ROW:
+                {'count': 1, 'removed': 4},
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_PAIR:
+                {'count': 0, 'removed': 0},
+            ChangeType.HIDDEN_TRIPLE:
+                {'count': 0, 'removed': 0},
             ChangeType.ROW_SUB_SET:
-                {'count': 6, 'removed': 11},
+                {'count': 0, 'removed': 0},
             ChangeType.COLUMN_SUB_SET:
                 {'count': 0, 'removed': 0},
             ChangeType.SQUARE_SUB_SET:
                 {'count': 0, 'removed': 0},
+            ChangeType.X_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SWORDFISH:
+                {'count': 0, 'removed': 0},
+            ChangeType.XY_WING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SIMPLE_COLORING:
+                {'count': 0, 'removed': 0},
+            ChangeType.SEARCH:
+                {'count': 1, 'removed': 98},
         }
     },
 }
@@ -0,0 +1,156 @@
+"""Generation of minimal puzzles with a unique solution, graded by the strategies Sudoku.solve() needs.
+
+    python generator.py 100 --difficulty DIFFICILE DIABOLIQUE -o puzzles.txt
+"""
+import argparse
+import random
+import sys
+from collections import namedtuple
+from functools import partial
+from itertools import count as count_from
+from typing import Collection, Dict, Iterator, List, Tuple
+
+from batch import map_chunks, DEFAULT_CHUNK_SIZE
+from constants import ChangeType
+from data import Difficulty
+from search import search, count
+from sudoku import Sudoku
+from tables import CELLS, SQUARES
+
+ALL_OPTIONS = Sudoku.ALL_OPTIONS
+
+# Cost of each change of solve() in the score of a puzzle
+WEIGHTS = {
+    ChangeType.DEFINE: 0,
+    ChangeType.CELL_SINGLETON: 1,
+    ChangeType.HIDDEN_SINGLE: 3,
+    ChangeType.EXCLUSIVE_ROW_IN_SQUARE: 5,
+    ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE: 5,
+    ChangeType.EXCLUSIVE_SQUARE_IN_ROW: 5,
+    ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN: 5,
+    ChangeType.HIDDEN_PAIR: 15,
+    ChangeType.HIDDEN_TRIPLE: 20,
+    ChangeType.ROW_SUB_SET: 25,
+    ChangeType.COLUMN_SUB_SET: 25,
+    ChangeType.SQUARE_SUB_SET: 25,
+    ChangeType.X_WING: 40,
+    ChangeType.XY_WING: 40,
+    ChangeType.SWORDFISH: 60,
+    ChangeType.SIMPLE_COLORING: 60,
+}
+# Lowest score of each difficulty solved without search, hardest first
+THRESHOLDS = [
+    (Difficulty.DIABOLIQUE, 120),
+    (Difficulty.DIFFICILE, 80),
+    (Difficulty.MOYEN, 50),
+    (Difficulty.FACILE, 0),
+]
+
+# grid and solution in the format of Sudoku.load_grid_string(), summary is the change_summary() of solve()
+Puzzle = namedtuple('Puzzle', ['grid', 'solution', 'difficulty', 'summary'])
+
+
+def score(summary: Dict[ChangeType, Dict[str, int]]) -> int:
+    return sum(WEIGHTS.get(change_type, 0) * summary[change_type]['count'] for change_type in summary)
+
+
+def grade(summary: Dict[ChangeType, Dict[str, int]]) -> Difficulty:
+    """Returns the difficulty of a puzzle from the change_summary() of its solve(): DEMONIAQUE when it needs search,
+    otherwise the difficulty of its score."""
+    if summary[ChangeType.SEARCH]['count']:
+        return Difficulty.DEMONIAQUE
+    puzzle_score = score(summary)
+    for difficulty, threshold in THRESHOLDS:
+        if puzzle_score >= threshold:
+            return difficulty
+    return Difficulty.FACILE
+
+
+def random_solution(rnd: random.Random) -> List[int]:
+    """Returns the 81 values of a random complete grid."""
+    cells = [None] * 81
+    # The squares of the diagonal do not constrain each other
+    for square in (0, 4, 8):
+        for index, value in zip(SQUARES[square], rnd.sample(range(1, 10), 9)):
+            cells[index] = value
+    solution, _ = search(cells, [ALL_OPTIONS] * 81)
+    # Relabel values, as search() tries them in increasing order
+    labels = [0] + rnd.sample(range(1, 10), 9)
+    return [labels[value] for value in solution]
+
+
+def minimal_puzzle(solution: List[int], rnd: random.Random) -> List[int]:
+    """Removes clues of a complete grid in random order, as long as the solution stays unique.
+
+    Returns the values of the puzzle (None for an empty cell). No clue of the result can be removed: removing clues
+    only adds solutions, so a clue which could not be removed at some point cannot be removed later."""
+    cells = list(solution)
+    candidates = [ALL_OPTIONS] * 81
+    for index in rnd.sample(CELLS, 81):
+        value = cells[index]
+        cells[index] = None
+        # The solution stays unique if no other value of the cell leads to a solution
+        candidates[index] = ALL_OPTIONS & ~(1 << (value - 1))
+        if count(cells, candidates, limit=1):
+            cells[index] = value
+        candidates[index] = ALL_OPTIONS
+    return cells
+
+
+def generate(rnd: random.Random) -> Puzzle:
+    solution = random_solution(rnd)
+    cells = minimal_puzzle(solution, rnd)
+    grid = ''.join(' ' if value is None else str(value) for value in cells)
+    s = Sudoku(history=False)
+    s.load_grid_string(grid)
+    s.solve()
+    summary = s.change_summary()
+    return Puzzle(grid, ''.join(str(value) for value in solution), grade(summary), summary)
+
+
+def _generate_chunk(chunk: List[Tuple[int, int]], difficulties: Collection[Difficulty]) -> List[Puzzle]:
+    puzzles = (generate(random.Random(seed)) for _, seed in chunk)
+    return [puzzle for puzzle in puzzles if difficulties is None or puzzle.difficulty in difficulties]
+
+
+def generate_many(number: int, difficulties: Collection[Difficulty] = None, seed: int = 0, workers: int = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Puzzle]:
+    """Yields number puzzles, of one of difficulties (any difficulty if None), generated over a pool of workers as by
+    batch.solve_many(). Each attempt is seeded from seed, so the same arguments give the same puzzles."""
+    if number <= 0:
+        return
+    generated = 0
+    for puzzle in map_chunks(partial(_generate_chunk, difficulties=difficulties), count_from(seed), workers,
+                             chunk_size):
+        yield puzzle
+        generated += 1
+        if generated == number:
+            return
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Generate minimal Sudoku puzzles with a unique solution.')
+    parser.add_argument('number', type=int, help='number of puzzles')
+    parser.add_argument('-d', '--difficulty', nargs='+', choices=[d.name for d in Difficulty],
+                        help='difficulties to keep (default: any)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first attempt (default: 0)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, 0 to generate in this process (default: one per core)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'attempts sent to a worker at once (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('-o', '--output', default='-', help='puzzle file, - for stdout (default)')
+    args = parser.parse_args(argv)
+
+    difficulties = None if args.difficulty is None else {Difficulty[name] for name in args.difficulty}
+    destination = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for puzzle in generate_many(args.number, difficulties, args.seed, args.workers, args.chunk_size):
+            destination.write(f'{puzzle.grid.replace(" ", ".")} {puzzle.difficulty.name}\n')
+    finally:
+        if destination is not sys.stdout:
+            destination.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Depth-first search used once the logical strategies of Sudoku.solve() make no more progress, and to count the
+solutions of a grid.
+
+The search works on candidates' masks (bit (v - 1) set when value v is possible). It propagates naked and hidden
+singles after every assignment, and branches on the cell with the fewest options left (minimum remaining values)."""
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Set, Tuple, Union
+
+from tables import get_tables, Tables
+from utils import is_single, popcount
+
+
+@lru_cache(maxsize=None)
+def _option_counter(size: int) -> Callable[[int], int]:
+    """Returns a function giving the number of options of a mask: a table lookup up to 16 values."""
+    if size <= 16:
+        return bytes(popcount(mask) for mask in range(1 << size)).__getitem__
+    return popcount
+
+
+def _propagate(masks: List[int], queue: List[int], changed: Set[int], tables: Tables) -> bool:
+    """Assigns the cells in queue (which hold a single option) and everything this implies.
+
+    changed holds the cells whose options were reduced since the last search for hidden singles.
+    Returns False when a contradiction is found."""
+    peers = tables.peers
+    units = tables.units
+    units_of = tables.units_of
+    all_options = (1 << tables.size) - 1
+    while True:
+        # Naked singles: remove the value of each assigned cell from its peers
+        while queue:
+            index = queue.pop()
+            bit = masks[index]
+            for peer in peers[index]:
+                mask = masks[peer]
+                if mask & bit:
+                    mask ^= bit
+                    if not mask:
+                        return False
+                    masks[peer] = mask
+                    changed.add(peer)
+                    if not mask & (mask - 1):
+                        queue.append(peer)
+        # Hidden singles: a value possible in only one cell of a unit whose cells lost options
+        touched = set()
+        for index in changed:
+            touched.update(units_of[index])
+        changed = set()
+        for unit_index in touched:
+            unit = units[unit_index]
+            once = twice = 0
+            for index in unit:
+                mask = masks[index]
+                twice |= once & mask
+                once |= mask
+            if once != all_options:
+                return False
+            once &= ~twice
+            while once:
+                bit = once & -once
+                once ^= bit
+                for index in unit:
+                    if masks[index] & bit:
+                        if masks[index] != bit:
+                            masks[index] = bit
+                            queue.append(index)
+                        break
+        if not queue:
+            return True
+
+
+def _branch_cell(masks: List[int], tables: Tables) -> Optional[int]:
+    """Returns the undefined cell with the fewest options, or None when every cell is defined."""
+    count_options = _option_counter(tables.size)
+    best_index = None
+    best_count = tables.size + 1
+    for index in tables.cells:
+        count = count_options(masks[index])
+        if count > 1:
+            if count < best_count:
+                best_index, best_count = index, count
+                if count == 2:
+                    break
+    return best_index
+
+
+def _search(masks: List[int], tables: Tables) -> Tuple[Optional[List[int]], int]:
+    best_index = _branch_cell(masks, tables)
+    if best_index is None:
+        return masks, 0
+
+    nodes = 0
+    options = masks[best_index]
+    while options:
+        bit = options & -options
+        options ^= bit
+        nodes += 1
+        branch = masks[:]
+        branch[best_index] = bit
+        if _propagate(branch, [best_index], set(), tables):
+            solution, explored = _search(branch, tables)
+            nodes += explored
+            if solution is not None:
+                return solution, nodes
+    return None, nodes
+
+
+def _count(masks: List[int], limit: int, tables: Tables) -> int:
+    best_index = _branch_cell(masks, tables)
+    if best_index is None:
+        return 1
+    found = 0
+    options = masks[best_index]
+    while options:
+        bit = options & -options
+        options ^= bit
+        branch = masks[:]
+        branch[best_index] = bit
+        if _propagate(branch, [best_index], set(), tables):
+            found += _count(branch, limit - found, tables)
+            if found >= limit:
+                break
+    return found
+
+
+def _initial_masks(cells: Sequence[Union[int, None]], candidates: Sequence[int],
+                   tables: Tables) -> Optional[List[int]]:
+    """Returns the masks of a grid once singles are propagated, or None when it is found contradictory."""
+    masks = []
+    queue = []
+    for index in tables.cells:
+        if cells[index] is not None:
+            masks.append(1 << (cells[index] - 1))
+            queue.append(index)
+        else:
+            mask = candidates[index]
+            if not mask:
+                return None
+            if is_single(mask):
+                queue.append(index)
+            masks.append(mask)
+    if not _propagate(masks, queue, set(tables.cells), tables):
+        return None
+    return masks
+
+
+def search(cells: Sequence[Union[int, None]], candidates: Sequence[int],
+           size: int = 9) -> Tuple[Optional[List[int]], int]:
+    """Completes a grid of size x size cells by search.
+
+    cells holds the value of each cell (None when undefined) and candidates the options' mask of each cell, both in
+    row-major order. Returns the solution as a list of values (None when the grid has no solution) and the number
+    of nodes explored."""
+    tables = get_tables(size)
+    masks = _initial_masks(cells, candidates, tables)
+    if masks is None:
+        return None, 0
+    solution, nodes = _search(masks, tables)
+    if solution is None:
+        return None, nodes
+    return [mask.bit_length() for mask in solution], nodes
+
+
+def count(cells: Sequence[Union[int, None]], candidates: Sequence[int], limit: int = 2, size: int = 9) -> int:
+    """Counts the solutions of a grid given as for search(), stopping as soon as limit solutions are found.
+
+    Returns the number of solutions, at most limit."""
+    tables = get_tables(size)
+    masks = _initial_masks(cells, candidates, tables)
+    if masks is None:
+        return 0
+    return _count(masks, limit, tables)
@@ -0,0 +1,345 @@
+"""Asyncio service solving grids for local clients, over HTTP/JSON or a line protocol.
+
+    python service.py --port 8081
+
+Both protocols share the port, told apart by the first line a client sends:
+- HTTP: POST /solve with a JSON body {"grid": "..."} answers {"grid": ..., "solution": ..., "summary": {...}}, and a
+  body {"grids": [...]} answers {"results": [...]}. GET /health answers the counters of the service. Connections are
+  kept alive unless the client asks otherwise.
+- Line protocol: a connection whose first line is not an HTTP request line sends one grid per line (81 characters,
+  with '.', '0' or a space for an empty cell), and receives one JSON result per line, in the same order.
+
+A result holds the solution (None when the grid has none) and the change_summary() of the solve, by change type name,
+or an error for a grid which cannot be loaded.
+
+Grids of all connections are gathered in batches solved by a pool of worker processes, so the event loop never
+blocks on a solve. A batch is formed when a worker slot is free: under load batches grow up to batch_size, and a lone
+grid waits at most batch_delay. The queue of grids waiting for a batch is bounded, as is the number of grids in
+flight on each connection: when they are full, connections stop being read until the workers catch up."""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from cli import BLANKS
+from sudoku import Sudoku
+
+DEFAULT_PORT = 8081
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_BATCH_DELAY = 0.002
+DEFAULT_MAX_QUEUED = 4096
+# Grids of a line protocol connection solved or being solved, but not answered yet
+DEFAULT_WINDOW = 256
+# Largest HTTP body accepted, in bytes
+MAX_BODY = 1 << 20
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+def solve_request(grid: str) -> Dict:
+    """Solves a grid in the format of Sudoku.load_grid_string(), '.' and '0' being accepted for an empty cell."""
+    grid = grid.translate(BLANKS)
+    s = Sudoku(history=False)
+    try:
+        s.load_grid_string(grid)
+    except ValueError as e:
+        return {'grid': grid, 'error': e.args[0]}
+    s.solve()
+    return {
+        'grid': grid,
+        'solution': s.grid_string() if s.solved() else None,
+        'summary': {change_type.name: stats for change_type, stats in s.change_summary().items()},
+    }
+
+
+def _solve_batch(grids: List[str]) -> List[Dict]:
+    return [solve_request(grid) for grid in grids]
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SolveService:
+    def __init__(self, workers: int = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 batch_delay: float = DEFAULT_BATCH_DELAY, max_queued: int = DEFAULT_MAX_QUEUED,
+                 window: int = DEFAULT_WINDOW):
+        """workers is the number of worker processes (one per core by default). With workers=0, grids are solved in
+        a thread of this process, which keeps the event loop free but solves one batch at a time."""
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+        if max_queued < 1 or window < 1:
+            raise ValueError('Queue and window must hold at least 1 grid')
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_queued = max_queued
+        self.window = window
+        # Counters reported by GET /health
+        self.solved = 0
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[Executor] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._running = set()
+        self._connections = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        if self._batcher is not None:
+            return
+        self._queue = asyncio.Queue(self.max_queued)
+        if self.workers == 0:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            self._slots = asyncio.Semaphore(1)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # One batch queued per worker on top of the one it solves, so workers never wait for the event loop
+            self._slots = asyncio.Semaphore(2 * self.workers)
+        self._batcher = asyncio.create_task(self._batch_loop())
+
+    async def close(self):
+        """Stops the service: open connections are closed, batches being solved are completed and grids still waiting
+        for a batch are dropped."""
+        if self._batcher is None:
+            return
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        self._batcher = None
+        for connection in list(self._connections):
+            connection.cancel()
+        if self._connections:
+            await asyncio.wait(self._connections)
+        if self._running:
+            await asyncio.wait(self._running)
+        # Dropping grids makes room for those waiting to be queued, which are dropped in turn
+        while not self._queue.empty():
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+            await asyncio.sleep(0)
+        self._executor.shutdown()
+
+    async def solve(self, grid: str) -> Dict:
+        """Returns the result of a grid (see solve_request()), once solved by a worker. Waits for room in the queue
+        when it is full."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((grid, future))
+        return await future
+
+    async def _batch_loop(self):
+        queue = self._queue
+        while True:
+            await self._slots.acquire()
+            batch = [await queue.get()]
+            self._drain(batch)
+            if len(batch) < self.batch_size and self.batch_delay > 0:
+                await asyncio.sleep(self.batch_delay)
+                self._drain(batch)
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _drain(self, batch: List[Tuple[str, asyncio.Future]]):
+        queue = self._queue
+        while len(batch) < self.batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _solve_batch, [grid for grid, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.batches += 1
+            self.solved += len(batch)
+            for (_, future), result in zip(batch, results):
+                # The client may have gone away
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def health(self) -> Dict:
+        return {
+            'status': 'ok', 'workers': self.workers, 'solved': self.solved, 'batches': self.batches,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def serve(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Starts the service if needed, and returns a server listening on host and port (0 for any free port)."""
+        await self.start()
+        return await asyncio.start_server(self._handle, host, port, backlog=1024)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        try:
+            first_line = await reader.readline()
+            if _is_request_line(first_line):
+                await self._handle_http(first_line, reader, writer)
+            elif first_line:
+                await self._handle_lines(first_line, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # Connection lost, or a line longer than the limit of the reader
+            pass
+        except asyncio.CancelledError:
+            # Closed by close(): the connection ends like any other
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    async def _handle_lines(self, first_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Results are written in order by another task, while this one keeps reading up to window grids ahead
+        pending = asyncio.Queue(self.window)
+        answer = asyncio.create_task(self._write_lines(pending, writer))
+        try:
+            line = first_line
+            while line and not answer.done():
+                grid = line.decode('ascii', 'replace').rstrip('\r\n')
+                await pending.put(asyncio.ensure_future(self.solve(grid)))
+                line = await reader.readline()
+        except (asyncio.CancelledError, ConnectionError, ValueError):
+            answer.cancel()
+            raise
+        # The writer stops early when the client goes away
+        if not answer.done():
+            await pending.put(None)
+        await answer
+
+    async def _write_lines(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        while True:
+            future = await pending.get()
+            if future is None:
+                return
+            writer.write(json.dumps(await future).encode('ascii') + b'\n')
+            await writer.drain()
+
+    async def _handle_http(self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while request_line:
+            method, path, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+            body = None
+            try:
+                length = _content_length(headers)
+                body = await reader.readexactly(length) if length > 0 else b''
+                status, response = 200, await self._route(method, path, body)
+            except HttpError as e:
+                status, response = e.status, {'error': e.args[0]}
+                # The next request cannot be found when the body of this one was not read
+                if body is None:
+                    keep_alive = False
+            content = json.dumps(response).encode('ascii')
+            writer.write(
+                f'{version} {status} {_REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(content)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + content
+            )
+            await writer.drain()
+            if not keep_alive:
+                return
+            request_line = await reader.readline()
+            if request_line and not _is_request_line(request_line):
+                return
+
+    async def _route(self, method: str, path: str, body: bytes) -> Dict:
+        if path == '/health':
+            if method != 'GET':
+                raise HttpError(405, 'Use GET on /health')
+            return self.health()
+        if path != '/solve':
+            raise HttpError(404, f'No resource {path}')
+        if method != 'POST':
+            raise HttpError(405, 'Use POST on /solve')
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise HttpError(400, 'Body must be JSON')
+        if isinstance(request, dict) and isinstance(request.get('grid'), str):
+            return await self.solve(request['grid'])
+        if isinstance(request, dict) and isinstance(request.get('grids'), list) \
+                and all(isinstance(grid, str) for grid in request['grids']):
+            return {'results': list(await asyncio.gather(*(self.solve(grid) for grid in request['grids'])))}
+        raise HttpError(400, 'Body must hold a "grid" string or a "grids" list of strings')
+
+
+def _content_length(headers: Dict[str, str]) -> int:
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, 'Invalid Content-Length')
+    if length < 0:
+        raise HttpError(400, 'Invalid Content-Length')
+    if length > MAX_BODY:
+        raise HttpError(413, f'Body must be at most {MAX_BODY} bytes')
+    return length
+
+
+def _is_request_line(line: bytes) -> bool:
+    parts = line.split()
+    return len(parts) == 3 and parts[2].startswith(b'HTTP/')
+
+
+async def _serve_forever(service: SolveService, host: str, port: int):
+    async with service:
+        server = await service.serve(host, port)
+        address = server.sockets[0].getsockname()
+        print(f'Solving on {address[0]}:{address[1]} with {service.workers} workers', file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Serve Sudoku solving over HTTP/JSON and a line protocol.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help=f'port (default: {DEFAULT_PORT})')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes, 0 to solve in a thread (default: one per core)')
+    parser.add_argument('-b', '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'grids sent to a worker at once (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--batch-delay', type=float, default=DEFAULT_BATCH_DELAY * 1000,
+                        help=f'milliseconds a grid waits for others to fill its batch '
+                             f'(default: {DEFAULT_BATCH_DELAY * 1000:g})')
+    parser.add_argument('--max-queued', type=int, default=DEFAULT_MAX_QUEUED,
+                        help=f'grids waiting for a batch before clients stop being read '
+                             f'(default: {DEFAULT_MAX_QUEUED})')
+    args = parser.parse_args(argv)
+
+    service = SolveService(args.workers, args.batch_size, args.batch_delay / 1000, args.max_queued)
+    try:
+        asyncio.run(_serve_forever(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
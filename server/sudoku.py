@@ -1,339 +1,1039 @@
+from array import array
 from collections import namedtuple
-from typing import List, Union
+from functools import lru_cache
+from heapq import heappush, heappop
+from itertools import combinations
+from math import isqrt
+from time import perf_counter
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
 
 from constants import ChangeType
 from data import grids
-from utils import exclusive_sub_list, MIN_NB_OF_CONTAINERS
+from search import search, count
+from tables import get_tables
+from utils import exclusive_sub_list, is_single, MIN_NB_OF_CONTAINERS, popcount, bit_values, value_bit
 
 
 Change = namedtuple('Change', ['type', 'data', 'removed'])
+# State of a Sudoku captured by Sudoku.snapshot(): cell values, candidates' masks (as bytes), work queues, the node
+# of the change history (the change log as bytes without history) and the undo trail (as bytes)
+Snapshot = namedtuple('Snapshot', ['cells', 'candidates', 'singles', 'dirty', 'history', 'trail'])
+# Point of the change history returned by Sudoku.mark(), to come back to with Sudoku.undo_to(): the trail length and
+# the history node (the serial number of the last change of the log without history, 0 for none)
+Mark = namedtuple('Mark', ['trail', 'history'])
+
+# Undo trail entries: index | mask << _TRAIL_SHIFT when options of a cell are removed, ~index when a cell is defined
+_TRAIL_SHIFT = 10
+_TRAIL_INDEX = (1 << _TRAIL_SHIFT) - 1
+# Entries of the change log of a grid without history: change type value, options removed, trail length and serial
+# number (never reused by a grid, so that marks of undone branches are told apart)
+_LOG_ENTRY = 4
+
+# Symbols of the values in grid strings: value v is SYMBOLS[v - 1]
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+
+# Position in Sudoku._dirty of the flags of each strategy, in blocks of one flag per unit (SIZE flags). Hidden
+# strategies look at every unit, and have one flag per unit index of the tables (3 blocks). Fish, wings and coloring
+# look at the whole grid, and share a block with one flag each.
+_ROW_IN_SQUARE_FLAGS = 0
+_COLUMN_IN_SQUARE_FLAGS = 1
+_ROW_FLAGS = 2
+_COLUMN_FLAGS = 3
+_SQUARE_FLAGS = 4
+_HIDDEN_SINGLE_FLAGS = 5
+_HIDDEN_SUB_SET_FLAGS = 8
+_SQUARE_IN_ROW_FLAGS = 11
+_SQUARE_IN_COLUMN_FLAGS = 12
+_GRID_FLAGS = 13
+_NB_OF_FLAG_BLOCKS = 14
+
+# Flags of the grid strategies, within the _GRID_FLAGS block
+_X_WING_FLAG = 0
+_SWORDFISH_FLAG = 1
+_XY_WING_FLAG = 2
+_COLORING_FLAG = 3
+
+# Unit kinds, in the order of the unit indexes of the tables
+_UNIT_KINDS = ('row', 'column', 'square')
+
+
+@lru_cache(maxsize=None)
+def _flags_of(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns the flags to raise when the options of each cell change. Exclusive row/column checks of a square look
+    at the options of the rows/columns crossing it, and exclusive square checks of a row/column remove options from
+    the square, so they look at every row/column crossing the square of the cell."""
+    tables = get_tables(size)
+    return tuple(
+        tuple(
+            [_ROW_IN_SQUARE_FLAGS * size + square for square in tables.squares_of_row[tables.row_of[index]]]
+            + [_COLUMN_IN_SQUARE_FLAGS * size + square for square in tables.squares_of_column[tables.column_of[index]]]
+            + [_ROW_FLAGS * size + tables.row_of[index], _COLUMN_FLAGS * size + tables.column_of[index],
+               _SQUARE_FLAGS * size + tables.square_of[index]]
+            + [_HIDDEN_SINGLE_FLAGS * size + unit for unit in tables.units_of[index]]
+            + [_HIDDEN_SUB_SET_FLAGS * size + unit for unit in tables.units_of[index]]
+            # The first column (row) of the square holds one cell of each row (column) crossing it
+            + [_SQUARE_IN_ROW_FLAGS * size + tables.row_of[cell]
+               for cell in tables.square_columns[tables.square_of[index]][0]]
+            + [_SQUARE_IN_COLUMN_FLAGS * size + tables.column_of[cell]
+               for cell in tables.square_rows[tables.square_of[index]][0]]
+            + [_GRID_FLAGS * size + flag for flag in (_X_WING_FLAG, _SWORDFISH_FLAG, _XY_WING_FLAG, _COLORING_FLAG)]
+        )
+        for index in tables.cells
+    )
+
+
+def _trail_typecode(size: int) -> str:
+    # Up to 16x16 grids, trail entries fit in 4 bytes
+    return 'i' if size <= 16 else 'q'
+
+
+@lru_cache(maxsize=None)
+def _symbol_values(size: int) -> Dict[str, Union[int, None]]:
+    """Returns the value of each symbol of a grid string of the given size: None for an empty cell."""
+    symbol_values = {symbol: value for value, symbol in enumerate(SYMBOLS[:size], 1)}
+    symbol_values[' '] = None
+    return symbol_values
 
 
 class Sudoku:
+    # Defaults of the 9x9 grid, overridden by instances of other sizes
     SIZE = 9
     BLOCK = 3
     VALUE_RANGE = range(1, 1 + SIZE)
+    ALL_OPTIONS = (1 << SIZE) - 1
 
-    def __init__(self):
-        self._cell: List[List[Union[int, None]]] = [
-            [None for _ in range(Sudoku.SIZE)] for _ in range(Sudoku.SIZE)
-        ]
-        self._options: List[List[List[int]]] = [
-            [
-                [x for x in Sudoku.VALUE_RANGE]
-                for _ in range(Sudoku.SIZE)
-            ]
-            for _ in range(Sudoku.SIZE)
-        ]
-        self._changes: List[Change] = []
+    def __init__(self, size=SIZE, history=True):
+        """With history=False, changes are kept as a flat log of their type, options removed and trail length, without
+        their data: undo() and the changes of the log give Change(type, None, removed). This takes several times
+        less memory for bulk solving, where only change_summary() is needed."""
+        if size > len(SYMBOLS):
+            raise ValueError(f'Size must be at most {len(SYMBOLS)}')
+        self._tables = get_tables(size)
+        self._flags_of = _flags_of(size)
+        self.SIZE = size
+        self.BLOCK = self._tables.block
+        self.VALUE_RANGE = range(1, 1 + size)
+        self.ALL_OPTIONS = (1 << size) - 1
+        # Cell values, in row-major order
+        self._cell: List[Union[int, None]] = [None] * (size * size)
+        # Candidates' masks, one per cell in row-major order: bit (v - 1) is set when value v is an option
+        self._candidates = array('H' if size <= 16 else 'L', [self.ALL_OPTIONS]) * (size * size)
+        # Change history, as linked (change, previous node, trail length) nodes: snapshots and branches share it
+        self._history: Union[Tuple[Change, tuple, int], None] = None
+        # Change log replacing the history when it is off (see _LOG_ENTRY)
+        self._log = None if history else array('i')
+        self._serial = 0
+        # Undo trail: the options removed and the cells defined, in order (see _TRAIL_SHIFT)
+        self._trail = array(_trail_typecode(size))
+        # Work queues of the strategies: cells which dropped to a single option (lowest index first), and for each
+        # strategy the units changed since it last found nothing in them
+        self._singles: List[int] = []
+        self._dirty = bytearray(b'\x01' * (_NB_OF_FLAG_BLOCKS * size))
+        # Instrumentation: cells looked at by the strategies, and per-method statistics once profiling is enabled
+        self._cells_scanned = 0
+        self._profile: Union[Dict[str, Dict[str, Union[int, float]]], None] = None
 
     def __str__(self):
-        separator = "+-------+-------+-------+\n"
+        size, block = self.SIZE, self.BLOCK
+        separator = "+" + ("-" * (2 * block + 1) + "+") * block + "\n"
         s = separator
-        for r in range(Sudoku.SIZE):
+        for r in range(size):
             s += "|"
-            for c in range(Sudoku.SIZE):
-                if self._cell[r][c] is None:
+            for c in range(size):
+                value = self._cell[r * size + c]
+                if value is None:
                     s += "  "
                 else:
-                    s += f" {str(self._cell[r][c])}"
-                if c % Sudoku.BLOCK == 2:
+                    s += f" {SYMBOLS[value - 1]}"
+                if c % block == block - 1:
                     s += " |"
             s += "\n"
-            if r % Sudoku.BLOCK == 2:
+            if r % block == block - 1:
                 s += separator
         return s
 
     def print_options(self):
-        simple_separator = '++-------+-------+-------++-------+-------+-------++-------+-------+-------++\n'
-        double_separator = '++=======+=======+=======++=======+=======+=======++=======+=======+=======++\n'
+        size, block = self.SIZE, self.BLOCK
+        simple_separator = '++' + (('-' * (2 * block + 1) + '+') * block + '+') * block + '\n'
+        double_separator = '++' + (('=' * (2 * block + 1) + '+') * block + '+') * block + '\n'
         s = double_separator
-        for r in range(Sudoku.SIZE):
-            for sub_r in range(Sudoku.BLOCK):
+        for r in range(size):
+            for sub_r in range(block):
                 s += '||'
-                for c in range(Sudoku.SIZE):
-                    value = self._cell[r][c]
-                    options = self._options[r][c]
+                for c in range(size):
+                    value = self._cell[r * size + c]
+                    options = self._candidates[r * size + c]
                     if value is not None:
-                        if sub_r == 0:
-                            s += ' \\   /'
-                        elif sub_r == 1:
-                            s += f'   {str(value)}  '
+                        if sub_r == block // 2:
+                            s += ' ' * block + SYMBOLS[value - 1] + ' ' * (block - 1)
+                        elif sub_r == 0:
+                            s += ' \\' + ' ' * (2 * block - 3) + '/'
+                        elif sub_r == block - 1:
+                            s += ' /' + ' ' * (2 * block - 3) + '\\'
                         else:
-                            s += ' /   \\'
+                            s += ' ' * (2 * block)
                     else:
-                        pos1 = str(sub_r * 3 + 1) if (sub_r * 3 + 1) in options else ' '
-                        pos2 = str(sub_r * 3 + 2) if (sub_r * 3 + 2) in options else ' '
-                        pos3 = str(sub_r * 3 + 3) if (sub_r * 3 + 3) in options else ' '
-                        s += f' {pos1} {pos2} {pos3}'
+                        for v in range(sub_r * block + 1, (sub_r + 1) * block + 1):
+                            s += ' ' + (SYMBOLS[v - 1] if options & value_bit(v) else ' ')
 
                     s += " |"
-                    if c % Sudoku.BLOCK == 2:
+                    if c % block == block - 1:
                         s += "|"
                 s += '\n'
-            if r % Sudoku.BLOCK == 2:
+            if r % block == block - 1:
                 s += double_separator
             else:
                 s += simple_separator
         print(s)
 
-    @staticmethod
-    def _cells_in_square(row, column):
-        (top_row, top_column) = (row - row % Sudoku.BLOCK, column - column % Sudoku.BLOCK)
-        return [
-            (x, y)
-            for x in range(top_row, top_row + Sudoku.BLOCK)
-            for y in range(top_column, top_column + Sudoku.BLOCK)
-        ]
-
-    def load_grid(self, index):
-        g = grids[index]['grid']
-        pos = 0
-        for r in range(Sudoku.SIZE):
-            for c in range(Sudoku.SIZE):
-                v = g[pos]
-                pos += 1
-                if v != ' ':
-                    self.define_cell(r, c, int(v))
+    def cell(self, row, column) -> Union[int, None]:
+        """Returns the value of a cell, or None if it is not defined yet."""
+        return self._cell[row * self.SIZE + column]
+
+    def options(self, row, column) -> List[int]:
+        """Returns the sorted list of values still possible in a cell."""
+        return bit_values(self._candidates[row * self.SIZE + column])
+
+    def _set_options(self, row, column, values):
+        mask = 0
+        for value in values:
+            mask |= value_bit(value)
+        index = row * self.SIZE + column
+        self._candidates[index] = mask
+        self._touch(index)
+        if is_single(mask):
+            heappush(self._singles, index)
+
+    def _touch(self, index):
+        """Schedules the units of a cell whose options changed for the next run of each strategy."""
+        dirty = self._dirty
+        for flag in self._flags_of[index]:
+            dirty[flag] = 1
+
+    def _eliminate(self, index, bit):
+        """Removes an option from a cell, and schedules the work this may trigger."""
+        mask = self._candidates[index] ^ bit
+        self._candidates[index] = mask
+        self._trail.append(index | bit << _TRAIL_SHIFT)
+        dirty = self._dirty
+        for flag in self._flags_of[index]:
+            dirty[flag] = 1
+        if is_single(mask):
+            heappush(self._singles, index)
+
+    def _cells_in_square(self, row, column):
+        tables = self._tables
+        square = tables.square_of[row * self.SIZE + column]
+        return [(tables.row_of[index], tables.column_of[index]) for index in tables.squares[square]]
+
+    def load_grid(self, index, corpus=None):
+        """Loads puzzle index of data.grids, or of corpus (a corpus.Corpus) when given."""
+        self.load_grid_string(grids[index]['grid'] if corpus is None else corpus.grid(index))
+
+    def load_grid_string(self, grid):
+        """Defines the cells of a grid of SIZE * SIZE characters (81 for a 9x9 grid), in row-major order with a space
+        for an empty cell. Values above 9 are written with letters (see SYMBOLS)."""
+        if len(grid) != self.SIZE * self.SIZE:
+            raise ValueError(f'Grid must have {self.SIZE * self.SIZE} cells')
+        symbol_values = _symbol_values(self.SIZE)
+        try:
+            values = [symbol_values[symbol] for symbol in grid]
+        except KeyError:
+            raise ValueError('Value out of range') from None
+        self.define_cells(values)
+
+    def define_cells(self, values: Sequence[Union[int, None]]):
+        """Defines the cells of a whole grid: values holds the value of each cell in row-major order, None for a cell
+        left undefined. Records the same changes as define_cell() called on each cell in turn, but checks every value
+        before defining any cell, so an invalid grid is rejected without changing this one."""
+        size = self.SIZE
+        if len(values) != size * size:
+            raise ValueError(f'Grid must have {size * size} cells')
+        tables = self._tables
+        units_of = tables.units_of
+        cells = self._cell
+        candidates = self._candidates
+        # Values defined so far in each unit
+        used = [0] * (3 * size)
+        clues = []
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            if value not in self.VALUE_RANGE:
+                raise ValueError('Value out of range')
+            if cells[index] is not None:
+                raise ValueError('This cell already has a value')
+            bit = 1 << (value - 1)
+            row, column, square = units_of[index]
+            if not candidates[index] & bit or (used[row] | used[column] | used[square]) & bit:
+                raise ValueError('Value not compatible with other cells')
+            used[row] |= bit
+            used[column] |= bit
+            used[square] |= bit
+            clues.append((index, value, bit))
+
+        peers = tables.peers
+        row_of = tables.row_of
+        column_of = tables.column_of
+        trail = self._trail
+        # Cells whose options changed, scheduled once all the cells are defined
+        touched = set()
+        for index, value, bit in clues:
+            cells[index] = value
+            trail.append(~index)
+            removed = 0
+            for peer in peers[index]:
+                mask = candidates[peer]
+                if mask & bit:
+                    candidates[peer] = mask ^ bit
+                    trail.append(peer | bit << _TRAIL_SHIFT)
+                    touched.add(peer)
+                    removed += 1
+            mask = candidates[index]
+            if mask:
+                candidates[index] = 0
+                trail.append(index | mask << _TRAIL_SHIFT)
+                removed += popcount(mask)
+            touched.add(index)
+            self._cells_scanned += 1 + len(peers[index])
+            self._record(Change(
+                ChangeType.DEFINE, {'row': row_of[index], 'column': column_of[index], 'value': value}, removed
+            ))
+        dirty = self._dirty
+        flags_of = self._flags_of
+        # Every unit is scheduled already on a new grid
+        schedule = 0 in dirty
+        for index in touched:
+            if schedule:
+                for flag in flags_of[index]:
+                    dirty[flag] = 1
+            if is_single(candidates[index]):
+                heappush(self._singles, index)
+
+    def grid_string(self) -> str:
+        """Returns the grid in the format of load_grid_string()."""
+        return ''.join(' ' if value is None else SYMBOLS[value - 1] for value in self._cell)
 
     def solved(self) -> bool:
-        return all([self._cell[r][c] is not None for r in range(Sudoku.SIZE) for c in range(Sudoku.SIZE)])
+        return None not in self._cell
 
     def define_cell(self, row, column, value):
         # Validity checks
-        if row not in range(Sudoku.SIZE):
+        if row not in range(self.SIZE):
             raise ValueError(f'Row out of range')
-        if column not in range(Sudoku.SIZE):
+        if column not in range(self.SIZE):
             raise ValueError(f'Column out of range')
-        if self._cell[row][column] is not None:
+        if self._cell[row * self.SIZE + column] is not None:
             raise ValueError(f'This cell already has a value')
-        if value not in Sudoku.VALUE_RANGE:
+        if value not in self.VALUE_RANGE:
             print(value)
-            raise ValueError(f'Value out of range')
-        if value not in self._options[row][column]:
+            raise ValueError('Value out of range')
+        if not self._candidates[row * self.SIZE + column] & value_bit(value):
             raise ValueError(f'Value not compatible with other cells')
 
         # Define cell
-        self._cell[row][column] = value
+        self._assign(row * self.SIZE + column, value)
         removed = self._remove_options(row, column, value)
         change = Change(ChangeType.DEFINE, {'row': row, 'column': column, 'value': value}, removed)
-        self._changes.append(change)
+        self._record(change)
+
+    def _assign(self, index, value):
+        self._cell[index] = value
+        self._trail.append(~index)
+
+    def _clear_options(self, index):
+        """Removes every option left in a cell once it is defined. Returns the number of options removed."""
+        mask = self._candidates[index]
+        if mask:
+            self._candidates[index] = 0
+            self._trail.append(index | mask << _TRAIL_SHIFT)
+        self._touch(index)
+        return popcount(mask)
 
     def _remove_options(self, row, column, value):
+        candidates = self._candidates
+        bit = value_bit(value)
         removed = 0
-        # in row
-        for c in range(Sudoku.SIZE):
-            if c != column:
-                try:
-                    self._options[row][c].remove(value)
-                    removed += 1
-                except ValueError:
-                    pass
-        # in column
-        for r in range(Sudoku.SIZE):
-            if r != row:
-                try:
-                    self._options[r][column].remove(value)
-                    removed += 1
-                except ValueError:
-                    pass
-        # in square
-        for (r, c) in Sudoku._cells_in_square(row, column):
-            if r != row and c != column:
-                try:
-                    self._options[r][c].remove(value)
-                    removed += 1
-                except ValueError:
-                    pass
+        # in row, column and square
+        index = row * self.SIZE + column
+        peers = self._tables.peers[index]
+        self._cells_scanned += 1 + len(peers)
+        for peer in peers:
+            if candidates[peer] & bit:
+                self._eliminate(peer, bit)
+                removed += 1
         # remove options in cell
-        removed += len(self._options[row][column])
-        self._options[row][column] = []
+        removed += self._clear_options(index)
         return removed
 
     def _check_cell_singleton(self):
-        for r in range(Sudoku.SIZE):
-            for c in range(Sudoku.SIZE):
-                if len(self._options[r][c]) == 1:
-                    v = self._options[r][c][0]
-                    self._cell[r][c] = v
-                    removed = self._remove_options(r, c, v)
-                    change = Change(ChangeType.CELL_SINGLETON, {'row': r, 'column': c, 'value': v}, removed)
-                    self._changes.append(change)
-                    return change
+        candidates = self._candidates
+        singles = self._singles
+        while singles:
+            index = heappop(singles)
+            self._cells_scanned += 1
+            mask = candidates[index]
+            # The cell may have been defined or emptied since it was queued
+            if is_single(mask):
+                r, c = divmod(index, self.SIZE)
+                v = mask.bit_length()
+                self._assign(index, v)
+                removed = self._remove_options(r, c, v)
+                change = Change(ChangeType.CELL_SINGLETON, {'row': r, 'column': c, 'value': v}, removed)
+                self._record(change)
+                return change
         return None
 
-    def _find_value_in_square(self, square_row, square_column, value):
-        for r in range(square_row, square_row + Sudoku.BLOCK):
-            for c in range(square_column, square_column + Sudoku.BLOCK):
-                if self._cell[r][c] == value:
-                    return r, c
+    def _unit_data(self, unit_index):
+        """Returns the change data locating a unit: {'row': r}, {'column': c} or {'square': (row, column) origin}."""
+        kind, position = divmod(unit_index, self.SIZE)
+        if kind == 2:
+            return {'square': self._tables.square_origin[position]}
+        return {_UNIT_KINDS[kind]: position}
+
+    def _check_hidden_single(self):
+        """Defines a cell holding the only option left for a value in one of its units."""
+        candidates = self._candidates
+        tables = self._tables
+        dirty = self._dirty
+        slot = _HIDDEN_SINGLE_FLAGS * self.SIZE
+        for unit_index, unit in enumerate(tables.units):
+            if not dirty[slot + unit_index]:
+                continue
+            dirty[slot + unit_index] = 0
+            self._cells_scanned += self.SIZE
+            # Values which are options of exactly one cell (defined cells have no option left)
+            once = twice = 0
+            for index in unit:
+                mask = candidates[index]
+                twice |= once & mask
+                once |= mask
+            once &= ~twice
+            if once:
+                bit = once & -once
+                for index in unit:
+                    if candidates[index] & bit:
+                        break
+                r, c = divmod(index, self.SIZE)
+                v = bit.bit_length()
+                self._assign(index, v)
+                removed = self._remove_options(r, c, v)
+                change = Change(
+                    ChangeType.HIDDEN_SINGLE,
+                    {'row': r, 'column': c, 'value': v, 'unit': _UNIT_KINDS[unit_index // self.SIZE]},
+                    removed
+                )
+                self._record(change)
+                # Other values of the unit may be hidden singles too
+                dirty[slot + unit_index] = 1
+                return change
         return None
 
+    def _check_hidden_sub_set(self):
+        """Searches hidden pairs, then hidden triples: n values whose options are all in the same n cells of a unit,
+        so these cells cannot hold any other value."""
+        candidates = self._candidates
+        tables = self._tables
+        dirty = self._dirty
+        slot = _HIDDEN_SUB_SET_FLAGS * self.SIZE
+        for unit_index, unit in enumerate(tables.units):
+            if not dirty[slot + unit_index]:
+                continue
+            dirty[slot + unit_index] = 0
+            self._cells_scanned += self.SIZE
+            # Cells of the unit holding each value, as a mask of positions in the unit
+            positions = {}
+            for pos, index in enumerate(unit):
+                mask = candidates[index]
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    positions[bit] = positions.get(bit, 0) | 1 << pos
+            for size, change_type in ((2, ChangeType.HIDDEN_PAIR), (3, ChangeType.HIDDEN_TRIPLE)):
+                bits = [bit for bit in sorted(positions) if popcount(positions[bit]) <= size]
+                for sub_set in combinations(bits, size):
+                    union = 0
+                    for bit in sub_set:
+                        union |= positions[bit]
+                    if popcount(union) != size:
+                        continue
+                    sub_set_mask = sum(sub_set)
+                    removed = []
+                    for pos, index in enumerate(unit):
+                        if union >> pos & 1:
+                            for value in bit_values(candidates[index] & ~sub_set_mask):
+                                self._eliminate(index, value_bit(value))
+                                removed.append((tables.row_of[index], tables.column_of[index], value))
+                    if len(removed) > 0:
+                        change = Change(
+                            change_type,
+                            dict(self._unit_data(unit_index), sub_set={bit.bit_length() for bit in sub_set},
+                                 removed=removed),
+                            len(removed)
+                        )
+                        self._record(change)
+                        return change
+        return None
+
+    def _values_in_square(self, square):
+        """Returns the mask of values already defined in a square."""
+        mask = 0
+        for index in self._tables.squares[square]:
+            value = self._cell[index]
+            if value is not None:
+                mask |= value_bit(value)
+        return mask
+
     def _check_exclusive_row_in_square(self):
-        # Iterate on all squares
-        for square_row in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-            for square_column in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-                for value in Sudoku.VALUE_RANGE:
-                    # Check that no cell in the square has this value
-                    if self._find_value_in_square(square_row, square_column, value) is None:
-                        # Check if value is present in options in one row only
-                        rows_with_value = []
-                        for row in range(square_row, square_row + Sudoku.BLOCK):
-                            if any(
-                                [value in self._options[row][col]
-                                 for col in range(square_column, square_column + Sudoku.BLOCK)]
-                            ):
-                                rows_with_value.append(row)
-                        if len(rows_with_value) == 1:
-                            exclusive_row = rows_with_value[0]
-                            # Check if value is contained in options in other squares on same row
-                            removables = []
-                            for column in range(Sudoku.SIZE):
-                                if (column // Sudoku.BLOCK) != (square_column // Sudoku.BLOCK):
-                                    if value in self._options[exclusive_row][column]:
-                                        removables.append(column)
-                            if len(removables) > 0:
-                                # Remove value from these options and return the changes performed
-                                for column in removables:
-                                    self._options[exclusive_row][column].remove(value)
-                                change = Change(
-                                    ChangeType.EXCLUSIVE_ROW_IN_SQUARE,
-                                    {'square': (square_row, square_column), 'value': value,
-                                     'exclusive row': exclusive_row, 'removed': removables},
-                                    len(removables)
-                                )
-                                self._changes.append(change)
-                                return change
+        candidates = self._candidates
+        tables = self._tables
+        dirty = self._dirty
+        slot = _ROW_IN_SQUARE_FLAGS * self.SIZE
+        # Iterate on squares changed since last run
+        for square in range(self.SIZE):
+            if not dirty[slot + square]:
+                continue
+            dirty[slot + square] = 0
+            self._cells_scanned += self.SIZE
+            # Options of each row within the square
+            row_options = []
+            for cells in tables.square_rows[square]:
+                mask = 0
+                for index in cells:
+                    mask |= candidates[index]
+                row_options.append(mask)
+            defined = self._values_in_square(square)
+            for value in self.VALUE_RANGE:
+                bit = value_bit(value)
+                # Check that no cell in the square has this value
+                if not defined & bit:
+                    # Check if value is present in options in one row only
+                    rows_with_value = [i for i, mask in enumerate(row_options) if mask & bit]
+                    if len(rows_with_value) == 1:
+                        exclusive_row = tables.row_of[tables.square_rows[square][rows_with_value[0]][0]]
+                        # Check if value is contained in options in other squares on same row
+                        removables = [
+                            index for index in tables.rows[exclusive_row]
+                            if tables.square_of[index] != square and candidates[index] & bit
+                        ]
+                        if len(removables) > 0:
+                            # Remove value from these options and return the changes performed
+                            for index in removables:
+                                self._eliminate(index, bit)
+                            change = Change(
+                                ChangeType.EXCLUSIVE_ROW_IN_SQUARE,
+                                {'square': tables.square_origin[square], 'value': value,
+                                 'exclusive row': exclusive_row, 'removed': [tables.column_of[i] for i in removables]},
+                                len(removables)
+                            )
+                            self._record(change)
+                            return change
         return None
 
     def _check_exclusive_column_in_square(self):
-        # Iterate on all squares
-        for square_row in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-            for square_column in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-                for value in Sudoku.VALUE_RANGE:
-                    # Check that no cell in the square has this value
-                    if self._find_value_in_square(square_row, square_column, value) is None:
-                        # Check if value is present in options in one column only
-                        columns_with_value = []
-                        for column in range(square_column, square_column + Sudoku.BLOCK):
-                            if any(
-                                [value in self._options[row][column]
-                                 for row in range(square_row, square_row + Sudoku.BLOCK)]
-                            ):
-                                columns_with_value.append(column)
-                        if len(columns_with_value) == 1:
-                            exclusive_column = columns_with_value[0]
-                            # Check if value is contained in options in other squares on same column
-                            removables = []
-                            for row in range(Sudoku.SIZE):
-                                if (row // Sudoku.BLOCK) != (square_row // Sudoku.BLOCK):
-                                    if value in self._options[row][exclusive_column]:
-                                        removables.append(row)
-                            if len(removables) > 0:
-                                # Remove value from these options and return the changes performed
-                                for row in removables:
-                                    self._options[row][exclusive_column].remove(value)
-                                change = Change(
-                                    ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE,
-                                    {'square': (square_row, square_column), 'value': value,
-                                     'exclusive column': exclusive_column, 'removed': removables},
-                                    len(removables)
-                                )
-                                self._changes.append(change)
-                                return change
+        candidates = self._candidates
+        tables = self._tables
+        dirty = self._dirty
+        slot = _COLUMN_IN_SQUARE_FLAGS * self.SIZE
+        # Iterate on squares changed since last run
+        for square in range(self.SIZE):
+            if not dirty[slot + square]:
+                continue
+            dirty[slot + square] = 0
+            self._cells_scanned += self.SIZE
+            # Options of each column within the square
+            column_options = []
+            for cells in tables.square_columns[square]:
+                mask = 0
+                for index in cells:
+                    mask |= candidates[index]
+                column_options.append(mask)
+            defined = self._values_in_square(square)
+            for value in self.VALUE_RANGE:
+                bit = value_bit(value)
+                # Check that no cell in the square has this value
+                if not defined & bit:
+                    # Check if value is present in options in one column only
+                    columns_with_value = [i for i, mask in enumerate(column_options) if mask & bit]
+                    if len(columns_with_value) == 1:
+                        exclusive_column = tables.column_of[tables.square_columns[square][columns_with_value[0]][0]]
+                        # Check if value is contained in options in other squares on same column
+                        removables = [
+                            index for index in tables.columns[exclusive_column]
+                            if tables.square_of[index] != square and candidates[index] & bit
+                        ]
+                        if len(removables) > 0:
+                            # Remove value from these options and return the changes performed
+                            for index in removables:
+                                self._eliminate(index, bit)
+                            change = Change(
+                                ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE,
+                                {'square': tables.square_origin[square], 'value': value,
+                                 'exclusive column': exclusive_column,
+                                 'removed': [tables.row_of[i] for i in removables]},
+                                len(removables)
+                            )
+                            self._record(change)
+                            return change
+        return None
+
+    def _find_exclusive_square_in_line(self, lines, squares_of_line, slot, change_type, line_name):
+        """Searches a value whose options in a row (or column) are all in one square: the value of the line is in this
+        square, so it cannot be in the other cells of the square."""
+        candidates = self._candidates
+        tables = self._tables
+        dirty = self._dirty
+        block = self.BLOCK
+        for line in range(self.SIZE):
+            if not dirty[slot + line]:
+                continue
+            dirty[slot + line] = 0
+            self._cells_scanned += self.SIZE
+            cells = lines[line]
+            # Options of the line within each square it crosses, and values found in only one of them
+            segment_options = []
+            once = twice = 0
+            for i in range(block):
+                mask = 0
+                for index in cells[i * block:(i + 1) * block]:
+                    mask |= candidates[index]
+                segment_options.append(mask)
+                twice |= once & mask
+                once |= mask
+            once &= ~twice
+            while once:
+                bit = once & -once
+                once ^= bit
+                value = bit.bit_length()
+                segment = next(i for i, mask in enumerate(segment_options) if mask & bit)
+                square = squares_of_line[line][segment]
+                removables = [
+                    index for index in tables.squares[square]
+                    if index not in cells and candidates[index] & bit
+                ]
+                if len(removables) > 0:
+                    for index in removables:
+                        self._eliminate(index, bit)
+                    change = Change(
+                        change_type,
+                        {line_name: line, 'value': value, 'exclusive square': tables.square_origin[square],
+                         'removed': [(tables.row_of[i], tables.column_of[i]) for i in removables]},
+                        len(removables)
+                    )
+                    self._record(change)
+                    return change
+        return None
+
+    def _check_exclusive_square_in_row(self):
+        tables = self._tables
+        return self._find_exclusive_square_in_line(
+            tables.rows, tables.squares_of_row, _SQUARE_IN_ROW_FLAGS * self.SIZE, ChangeType.EXCLUSIVE_SQUARE_IN_ROW,
+            'row'
+        )
+
+    def _check_exclusive_square_in_column(self):
+        tables = self._tables
+        return self._find_exclusive_square_in_line(
+            tables.columns, tables.squares_of_column, _SQUARE_IN_COLUMN_FLAGS * self.SIZE,
+            ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN, 'column'
+        )
+
+    def _remove_sub_set(self, unit, members, options_sub_set):
+        """Removes the values of an exclusive sub-set from the cells of a unit which are not members of it.
+
+        Returns the list of (cell index, value) removed."""
+        candidates = self._candidates
+        removed = []
+        for index in unit:
+            if index not in members:
+                for value in options_sub_set:
+                    if candidates[index] & value_bit(value):
+                        self._eliminate(index, value_bit(value))
+                        removed.append((index, value))
+        return removed
+
+    def _find_sub_set(self, unit):
+        """Searches an exclusive sub-set among the undefined cells of a unit.
+
+        Returns the set of values and the cell indexes of the sub-set, or None."""
+        members = [index for index in unit if self._cell[index] is None]
+        if len(members) >= MIN_NB_OF_CONTAINERS:
+            result = exclusive_sub_list([bit_values(self._candidates[index]) for index in members])
+            if result is not None:
+                options_sub_set, members_indexes = result
+                return options_sub_set, [members[i] for i in members_indexes]
         return None
 
     def _check_row_sub_set(self):
-        for row in range(Sudoku.SIZE):
-            options = []
-            for column in range(Sudoku.SIZE):
-                if self._cell[row][column] is None:
-                    options.append((column, self._options[row][column]))
-            if len(options) >= MIN_NB_OF_CONTAINERS:
-                result = exclusive_sub_list([o for _, o in options])
-                if result is not None:
-                    options_sub_set, members_indexes = result
-                    members_columns = [options[index][0] for index in members_indexes]
-                    removed = []
-                    for column in range(Sudoku.SIZE):
-                        if column not in members_columns:
-                            for value in options_sub_set:
-                                try:
-                                    self._options[row][column].remove(value)
-                                    removed.append((column, value))
-                                except ValueError:
-                                    pass
-                    if len(removed) > 0:
+        tables = self._tables
+        dirty = self._dirty
+        slot = _ROW_FLAGS * self.SIZE
+        for row in range(self.SIZE):
+            if not dirty[slot + row]:
+                continue
+            dirty[slot + row] = 0
+            self._cells_scanned += self.SIZE
+            result = self._find_sub_set(tables.rows[row])
+            if result is not None:
+                options_sub_set, members = result
+                removed = self._remove_sub_set(tables.rows[row], members, options_sub_set)
+                if len(removed) > 0:
+                    change = Change(
+                        ChangeType.ROW_SUB_SET,
+                        {'row': row, 'sub_set': options_sub_set,
+                         'removed': [(tables.column_of[index], value) for index, value in removed]},
+                        len(removed)
+                    )
+                    self._record(change)
+                    return change
+        return None
+
+    def _check_column_sub_set(self):
+        tables = self._tables
+        dirty = self._dirty
+        slot = _COLUMN_FLAGS * self.SIZE
+        for column in range(self.SIZE):
+            if not dirty[slot + column]:
+                continue
+            dirty[slot + column] = 0
+            self._cells_scanned += self.SIZE
+            result = self._find_sub_set(tables.columns[column])
+            if result is not None:
+                options_sub_set, members = result
+                removed = self._remove_sub_set(tables.columns[column], members, options_sub_set)
+                if len(removed) > 0:
+                    change = Change(
+                        ChangeType.COLUMN_SUB_SET,
+                        {'column': column, 'sub_set': options_sub_set,
+                         'removed': [(tables.row_of[index], value) for index, value in removed]},
+                        len(removed)
+                    )
+                    self._record(change)
+                    return change
+        return None
+
+    def _check_square_sub_set(self):
+        tables = self._tables
+        dirty = self._dirty
+        slot = _SQUARE_FLAGS * self.SIZE
+        for square in range(self.SIZE):
+            if not dirty[slot + square]:
+                continue
+            dirty[slot + square] = 0
+            self._cells_scanned += self.SIZE
+            result = self._find_sub_set(tables.squares[square])
+            if result is not None:
+                options_sub_set, members = result
+                removed = self._remove_sub_set(tables.squares[square], members, options_sub_set)
+                if len(removed) > 0:
+                    change = Change(
+                        ChangeType.SQUARE_SUB_SET,
+                        {'square': tables.square_origin[square], 'sub_set': options_sub_set,
+                         'removed': [
+                             (tables.row_of[index], tables.column_of[index], value) for index, value in removed
+                         ]},
+                        len(removed)
+                    )
+                    self._record(change)
+                    return change
+        return None
+
+    def _grid_flag(self, flag):
+        """Returns whether a grid strategy has to run, and lowers its flag."""
+        position = _GRID_FLAGS * self.SIZE + flag
+        if not self._dirty[position]:
+            return False
+        self._dirty[position] = 0
+        return True
+
+    def _find_fish(self, size, change_type):
+        """Searches size rows (or columns) in which the options of a value are all in the same size columns (or rows):
+        the value of each of these columns is in one of the rows, so it cannot be in the other cells of the columns."""
+        candidates = self._candidates
+        tables = self._tables
+        self._cells_scanned += self.SIZE * self.SIZE
+        # Positions of each value in each row (as a mask of columns) and in each column (as a mask of rows)
+        row_positions = [[0] * self.SIZE for _ in self.VALUE_RANGE]
+        column_positions = [[0] * self.SIZE for _ in self.VALUE_RANGE]
+        for index in tables.cells:
+            mask = candidates[index]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                value = bit.bit_length() - 1
+                row_positions[value][tables.row_of[index]] |= 1 << tables.column_of[index]
+                column_positions[value][tables.column_of[index]] |= 1 << tables.row_of[index]
+        for value in self.VALUE_RANGE:
+            bit = value_bit(value)
+            for base_name, positions, covers in (('rows', row_positions[value - 1], tables.columns),
+                                                 ('columns', column_positions[value - 1], tables.rows)):
+                lines = [line for line, mask in enumerate(positions) if mask & (mask - 1) and popcount(mask) <= size]
+                for base_lines in combinations(lines, size):
+                    union = 0
+                    for line in base_lines:
+                        union |= positions[line]
+                    if popcount(union) != size:
+                        continue
+                    cover_lines = [pos for pos in range(self.SIZE) if union >> pos & 1]
+                    removables = [
+                        covers[cover][line] for cover in cover_lines for line in range(self.SIZE)
+                        if line not in base_lines and candidates[covers[cover][line]] & bit
+                    ]
+                    if len(removables) > 0:
+                        for index in removables:
+                            self._eliminate(index, bit)
+                        cover_name = 'columns' if base_name == 'rows' else 'rows'
                         change = Change(
-                            ChangeType.ROW_SUB_SET,
-                            {'row': row, 'sub_set': options_sub_set, 'removed': removed},
-                            len(removed)
+                            change_type,
+                            {'value': value, base_name: list(base_lines), cover_name: cover_lines,
+                             'removed': [(tables.row_of[i], tables.column_of[i]) for i in removables]},
+                            len(removables)
                         )
-                        self._changes.append(change)
+                        self._record(change)
                         return change
         return None
 
-    def _check_column_sub_set(self):
-        for column in range(Sudoku.SIZE):
-            options = []
-            for row in range(Sudoku.SIZE):
-                if self._cell[row][column] is None:
-                    options.append((row, self._options[row][column]))
-            if len(options) >= MIN_NB_OF_CONTAINERS:
-                result = exclusive_sub_list([o for _, o in options])
-                if result is not None:
-                    options_sub_set, members_indexes = result
-                    members_rows = [options[index][0] for index in members_indexes]
-                    removed = []
-                    for row in range(Sudoku.SIZE):
-                        if row not in members_rows:
-                            for value in options_sub_set:
-                                try:
-                                    self._options[row][column].remove(value)
-                                    removed.append((row, value))
-                                except ValueError:
-                                    pass
-                    if len(removed) > 0:
+    def _check_x_wing(self):
+        if not self._grid_flag(_X_WING_FLAG):
+            return None
+        return self._find_fish(2, ChangeType.X_WING)
+
+    def _check_swordfish(self):
+        if not self._grid_flag(_SWORDFISH_FLAG):
+            return None
+        return self._find_fish(3, ChangeType.SWORDFISH)
+
+    def _check_xy_wing(self):
+        """Searches a cell with options x and y (the pivot) seeing a cell with options x and z and a cell with options y
+        and z (the pincers): whatever the value of the pivot, one of the pincers is z, so z cannot be in a cell seeing
+        both pincers."""
+        if not self._grid_flag(_XY_WING_FLAG):
+            return None
+        candidates = self._candidates
+        tables = self._tables
+        peers = tables.peers
+        self._cells_scanned += self.SIZE * self.SIZE
+        bivalues = {index for index in tables.cells if popcount(candidates[index]) == 2}
+        for pivot in sorted(bivalues):
+            pivot_mask = candidates[pivot]
+            wings = [peer for peer in peers[pivot] if peer in bivalues and popcount(candidates[peer] & pivot_mask) == 1]
+            for first in wings:
+                z = candidates[first] & ~pivot_mask
+                # The other pincer holds z and the other option of the pivot
+                second_mask = (pivot_mask & ~candidates[first]) | z
+                for second in wings:
+                    if candidates[second] != second_mask:
+                        continue
+                    removables = [
+                        index for index in peers[first]
+                        if index != second and index in peers[second] and candidates[index] & z
+                    ]
+                    if len(removables) > 0:
+                        for index in removables:
+                            self._eliminate(index, z)
                         change = Change(
-                            ChangeType.COLUMN_SUB_SET,
-                            {'column': column, 'sub_set': options_sub_set, 'removed': removed},
-                            len(removed)
+                            ChangeType.XY_WING,
+                            {'pivot': divmod(pivot, self.SIZE), 'pincers': [divmod(first, self.SIZE),
+                                                                              divmod(second, self.SIZE)],
+                             'value': z.bit_length(),
+                             'removed': [(tables.row_of[i], tables.column_of[i]) for i in removables]},
+                            len(removables)
                         )
-                        self._changes.append(change)
+                        self._record(change)
                         return change
         return None
 
-    def _check_square_sub_set(self):
-        for block_row in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-            for block_column in range(0, Sudoku.SIZE, Sudoku.BLOCK):
-                options = []
-                for row, column in self._cells_in_square(block_row, block_column):
-                    if self._cell[row][column] is None:
-                        options.append(((row, column), self._options[row][column]))
-                if len(options) >= MIN_NB_OF_CONTAINERS:
-                    result = exclusive_sub_list([o for _, o in options])
-                    if result is not None:
-                        options_sub_set, members_indexes = result
-                        sub_set_cells = [options[index][0] for index in members_indexes]
-                        removed = []
-                        for row, column in self._cells_in_square(block_row, block_column):
-                            if (row, column) not in sub_set_cells:
-                                for value in options_sub_set:
-                                    try:
-                                        self._options[row][column].remove(value)
-                                        removed.append((row, column, value))
-                                    except ValueError:
-                                        pass
-                        if len(removed) > 0:
-                            change = Change(
-                                ChangeType.SQUARE_SUB_SET,
-                                {'square': (block_row, block_column), 'sub_set': options_sub_set, 'removed': removed},
-                                len(removed)
-                            )
-                            self._changes.append(change)
-                            return change
+    def _check_simple_coloring(self):
+        """Colors with two colors the chains of cells linked by units where a value has only two options: the value is
+        in all the cells of one color. It is in none of the cells of a color holding two peers, and it cannot be in a
+        cell seeing both colors."""
+        if not self._grid_flag(_COLORING_FLAG):
+            return None
+        candidates = self._candidates
+        tables = self._tables
+        peers = tables.peers
+        self._cells_scanned += self.SIZE * self.SIZE
+        # Cells linked by each value: the two cells holding it in a unit
+        value_links = [{} for _ in self.VALUE_RANGE]
+        for unit in tables.units:
+            cells_of = {}
+            for index in unit:
+                mask = candidates[index]
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    cells_of.setdefault(bit, []).append(index)
+            for bit, cells in cells_of.items():
+                if len(cells) == 2:
+                    links = value_links[bit.bit_length() - 1]
+                    links.setdefault(cells[0], []).append(cells[1])
+                    links.setdefault(cells[1], []).append(cells[0])
+        for value in self.VALUE_RANGE:
+            bit = value_bit(value)
+            links = value_links[value - 1]
+            colored = {}
+            for start in sorted(links):
+                if start in colored:
+                    continue
+                # Color the chain of start, alternating colors along the links
+                colors = ([], [])
+                colored[start] = 0
+                stack = [start]
+                while stack:
+                    index = stack.pop()
+                    colors[colored[index]].append(index)
+                    for linked in links[index]:
+                        if linked not in colored:
+                            colored[linked] = 1 - colored[index]
+                            stack.append(linked)
+                removables = []
+                for color in colors:
+                    if any(other in peers[index] for index, other in combinations(color, 2)):
+                        removables = sorted(color)
+                        break
+                else:
+                    chain = set(colors[0]) | set(colors[1])
+                    removables = [
+                        index for index in tables.cells
+                        if candidates[index] & bit and index not in chain
+                        and any(cell in peers[index] for cell in colors[0])
+                        and any(cell in peers[index] for cell in colors[1])
+                    ]
+                if len(removables) > 0:
+                    for index in removables:
+                        self._eliminate(index, bit)
+                    change = Change(
+                        ChangeType.SIMPLE_COLORING,
+                        {'value': value, 'removed': [(tables.row_of[i], tables.column_of[i]) for i in removables]},
+                        len(removables)
+                    )
+                    self._record(change)
+                    return change
         return None
 
+    @property
+    def _changes(self) -> List[Change]:
+        if self._log is not None:
+            log = self._log
+            return [Change(ChangeType(log[i]), None, log[i + 1]) for i in range(0, len(log), _LOG_ENTRY)]
+        changes = []
+        node = self._history
+        while node is not None:
+            changes.append(node[0])
+            node = node[1]
+        changes.reverse()
+        return changes
+
+    def _record(self, change):
+        if self._log is None:
+            self._history = (change, self._history, len(self._trail))
+        else:
+            self._serial += 1
+            self._log.extend((change.type.value, change.removed, len(self._trail), self._serial))
+
+    def mark(self) -> Mark:
+        """Returns the current point of the change history, to come back to it later with undo_to()."""
+        if self._log is None:
+            return Mark(len(self._trail), self._history)
+        return Mark(len(self._trail), self._log[-1] if self._log else 0)
+
+    def undo(self) -> Union[Change, None]:
+        """Reverts the last change. Returns it, or None if there is no change left."""
+        if self._log is not None:
+            return self._undo_log()
+        node = self._history
+        if node is None:
+            return None
+        previous = node[1]
+        self._revert(previous[2] if previous is not None else 0)
+        self._history = previous
+        return node[0]
+
+    def _undo_log(self) -> Union[Change, None]:
+        log = self._log
+        if not log:
+            return None
+        change_type, removed = log[-_LOG_ENTRY], log[-_LOG_ENTRY + 1]
+        del log[-_LOG_ENTRY:]
+        self._revert(log[-2] if log else 0)
+        return Change(ChangeType(change_type), None, removed)
+
+    def undo_to(self, mark: Mark):
+        """Reverts every change made since mark() returned mark. Raises ValueError when the change of the mark is not
+        in the current history, e.g. once undone."""
+        if self._log is None:
+            node = self._history
+            while node is not mark.history:
+                if node is None:
+                    raise ValueError('Mark is not in the current history')
+                node = node[1]
+            self._revert(mark.trail)
+            self._history = mark.history
+        else:
+            length = self._log_length(mark.history)
+            self._revert(mark.trail)
+            del self._log[length:]
+
+    def _log_length(self, serial) -> int:
+        """Returns the length of the change log up to the change of a serial number (0 for none)."""
+        log = self._log
+        length = len(log)
+        while length and log[length - 1] > serial:
+            length -= _LOG_ENTRY
+        if length and log[length - 1] != serial or not length and serial:
+            raise ValueError('Mark is not in the current history')
+        return length
+
+    def _revert(self, length):
+        """Walks the undo trail back to length entries, giving back the options removed and undefining cells."""
+        trail = self._trail
+        candidates = self._candidates
+        while len(trail) > length:
+            entry = trail.pop()
+            if entry < 0:
+                self._cell[~entry] = None
+                continue
+            index = entry & _TRAIL_INDEX
+            mask = candidates[index] | entry >> _TRAIL_SHIFT
+            candidates[index] = mask
+            self._touch(index)
+            if is_single(mask):
+                heappush(self._singles, index)
+
+    def snapshot(self) -> Snapshot:
+        """Captures the state of the grid in an immutable Snapshot, to come back to it later with restore().
+
+        The change history is not copied: the snapshot keeps a reference to its current node (or the bytes of the
+        change log of a grid without history)."""
+        return Snapshot(
+            tuple(self._cell), self._candidates.tobytes(), tuple(self._singles), bytes(self._dirty),
+            self._history if self._log is None else self._log.tobytes(), self._trail.tobytes()
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """Brings the grid back to the state captured by snapshot(), including its change history."""
+        self._cell = list(snapshot.cells)
+        self._candidates = array(self._candidates.typecode, snapshot.candidates)
+        self._singles = list(snapshot.singles)
+        self._dirty = bytearray(snapshot.dirty)
+        if isinstance(snapshot.history, bytes):
+            self._history = None
+            self._log = array('i', snapshot.history)
+            # Serial numbers of the changes to come must not be reused from those of the log
+            if self._log:
+                self._serial = max(self._serial, self._log[-1])
+        else:
+            self._history = snapshot.history
+            self._log = None
+        self._trail = array(self._trail.typecode, snapshot.trail)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> 'Sudoku':
+        """Returns a new grid in the state captured by snapshot(), sharing its change history."""
+        s = cls(isqrt(len(snapshot.cells)))
+        s.restore(snapshot)
+        return s
+
     def change_summary(self):
         summary = {t: {'count': 0, 'removed': 0} for t in ChangeType}
         for c in self._changes:
@@ -341,22 +1041,124 @@ class Sudoku:
             summary[c.type]['removed'] += c.removed
         return summary
 
-    def solve(self):
+    def enable_profiling(self):
+        """Starts recording, for each _check_* strategy and for _remove_options: the number of calls, the number of
+        calls with a result (a change, or removed options), the wall time and the number of cells scanned. The time
+        and cells of a strategy include those of the _remove_options calls it makes.
+
+        Methods are only wrapped once profiling is enabled, so it costs nothing while disabled."""
+        if self._profile is not None:
+            return
+        self._profile = {name: {'calls': 0, 'hits': 0, 'time': 0.0, 'cells': 0} for name in PROFILED_METHODS}
+        for name in PROFILED_METHODS:
+            setattr(self, name, self._profiled(getattr(self, name), self._profile[name]))
+
+    def _profiled(self, method, stats):
+        def call(*args):
+            cells_scanned = self._cells_scanned
+            start = perf_counter()
+            result = method(*args)
+            stats['time'] += perf_counter() - start
+            stats['calls'] += 1
+            if result:
+                stats['hits'] += 1
+            stats['cells'] += self._cells_scanned - cells_scanned
+            return result
+        return call
+
+    def profile_summary(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """Returns the statistics recorded since enable_profiling(), by method name (empty if profiling is off)."""
+        if self._profile is None:
+            return {}
+        return {name: dict(stats) for name, stats in self._profile.items()}
+
+    def _search(self):
+        """Completes the grid by search, once the logical strategies make no more progress."""
+        solution, nodes = search(self._cell, self._candidates, self.SIZE)
+        if solution is None:
+            return None
+        removed = 0
+        for index in self._tables.cells:
+            removed += self._clear_options(index)
+            if self._cell[index] is None:
+                self._assign(index, solution[index])
+        change = Change(ChangeType.SEARCH, {'nodes': nodes}, removed)
+        self._record(change)
+        return change
+
+    def next_hint(self, use_search=True) -> Union[Change, None]:
+        """Applies the next step of solve() and returns its change, or None when the grid is solved or no strategy
+        makes progress (use_search=False). The change can be reverted with undo().
+
+        Strategies are tried from the cheapest to the most expensive. They keep their work queues between calls, so
+        stepping through a grid costs about the same as solve()."""
+        change = self._check_cell_singleton()
+        if change is not None:
+            return change
+        if self.solved():
+            return None
+        for name in STRATEGIES:
+            change = getattr(self, name)()
+            if change is not None:
+                return change
+        if use_search:
+            return self._search()
+        return None
+
+    def iter_steps(self, use_search=True) -> Iterator[Change]:
+        """Yields the changes of solve() one at a time, each applied when it is yielded."""
         while True:
-            if self._check_cell_singleton() is not None:
-                continue
-            elif self._check_exclusive_row_in_square() is not None:
-                continue
-            elif self._check_exclusive_column_in_square() is not None:
-                continue
-            elif self._check_row_sub_set() is not None:
-                continue
-            elif self._check_column_sub_set() is not None:
-                continue
-            elif self._check_square_sub_set() is not None:
-                continue
-            else:
-                break
+            change = self.next_hint(use_search)
+            if change is None:
+                return
+            yield change
+
+    def solve(self, use_search=True):
+        """Solves the grid with the logical strategies, then completes it by search if they are not enough.
+
+        With use_search=False, only the logical strategies are used and the grid may be left unsolved."""
+        for _ in self.iter_steps(use_search):
+            pass
+
+    def count_solutions(self, limit=2) -> int:
+        """Counts the solutions of the grid, up to limit: count_solutions() == 1 when the solution is unique.
+
+        The logical strategies narrow the options before the search, which stops as soon as limit solutions are found.
+        The grid is left as it was."""
+        if limit < 1:
+            raise ValueError('Limit must be at least 1')
+        mark = self.mark()
+        # Work queues of the strategies, which undo_to() does not bring back as they were
+        singles = self._singles[:]
+        dirty = bytes(self._dirty)
+        try:
+            self.solve(use_search=False)
+            return count(self._cell, self._candidates, limit, self.SIZE)
+        finally:
+            self.undo_to(mark)
+            self._singles = singles
+            self._dirty[:] = dirty
+
+
+# Strategies tried by Sudoku.next_hint() after _check_cell_singleton(), from the cheapest to the most expensive
+STRATEGIES = (
+    '_check_hidden_single',
+    '_check_exclusive_row_in_square',
+    '_check_exclusive_column_in_square',
+    '_check_exclusive_square_in_row',
+    '_check_exclusive_square_in_column',
+    '_check_hidden_sub_set',
+    '_check_row_sub_set',
+    '_check_column_sub_set',
+    '_check_square_sub_set',
+    '_check_x_wing',
+    '_check_xy_wing',
+    '_check_swordfish',
+    '_check_simple_coloring',
+)
+
+# Methods recorded by Sudoku.enable_profiling()
+PROFILED_METHODS = sorted(name for name in dir(Sudoku) if name.startswith('_check_')) + ['_remove_options']
 
 
 def play_sudoku():
@@ -369,11 +1171,9 @@ def play_sudoku():
                 s.define_cell(r, c, int(line[c]))
         print(s)
     print('Input complete. Starting solving')
-    while True:
+    for change in s.iter_steps():
         input('Press enter')
-        print(s._check_cell_singleton())
+        print(change)
         print(s)
-        if s.solved():
-            break
-    print('Solved!!')
+    print('Solved!!' if s.solved() else 'No solution')
     return s
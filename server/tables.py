@@ -0,0 +1,100 @@
+"""Index tables of the grid, built once per size.
+
+Cells are numbered 0 to SIZE * SIZE - 1 in row-major order. Units are numbered 0 to 3 * SIZE - 1: rows first, then
+columns, then squares (squares are numbered in row-major order too). The tables of the 9x9 grid are also available
+as module constants."""
+from collections import namedtuple
+from functools import lru_cache
+from math import isqrt
+from typing import Tuple
+
+Tables = namedtuple('Tables', [
+    'size', 'block', 'cells', 'row_of', 'column_of', 'square_of', 'rows', 'columns', 'squares', 'units', 'units_of',
+    'peers', 'square_origin', 'square_rows', 'square_columns', 'squares_of_row', 'squares_of_column',
+])
+
+
+@lru_cache(maxsize=None)
+def get_tables(size: int) -> Tables:
+    """Returns the tables of a grid of size x size cells, size being the square of the size of a square."""
+    block = isqrt(size)
+    if size < 4 or block * block != size:
+        raise ValueError('Size must be the square of an integer greater than 1')
+    cells = range(size * size)
+
+    row_of: Tuple[int, ...] = tuple(index // size for index in cells)
+    column_of: Tuple[int, ...] = tuple(index % size for index in cells)
+    square_of: Tuple[int, ...] = tuple(
+        (index // size) // block * block + (index % size) // block for index in cells
+    )
+
+    rows: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(index for index in cells if row_of[index] == row) for row in range(size)
+    )
+    columns: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(index for index in cells if column_of[index] == column) for column in range(size)
+    )
+    squares: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(index for index in cells if square_of[index] == square) for square in range(size)
+    )
+    units: Tuple[Tuple[int, ...], ...] = rows + columns + squares
+
+    # Indexes in units of the row, column and square of each cell
+    units_of: Tuple[Tuple[int, int, int], ...] = tuple(
+        (row_of[index], size + column_of[index], 2 * size + square_of[index]) for index in cells
+    )
+
+    # The cells sharing a row, a column or a square with each cell: row first, then column, then square
+    peers: Tuple[Tuple[int, ...], ...] = tuple(
+        rows[row_of[index]][:column_of[index]] + rows[row_of[index]][column_of[index] + 1:]
+        + columns[column_of[index]][:row_of[index]] + columns[column_of[index]][row_of[index] + 1:]
+        + tuple(
+            peer for peer in squares[square_of[index]]
+            if row_of[peer] != row_of[index] and column_of[peer] != column_of[index]
+        )
+        for index in cells
+    )
+
+    # Top-left (row, column) of each square
+    square_origin: Tuple[Tuple[int, int], ...] = tuple(
+        (square // block * block, square % block * block) for square in range(size)
+    )
+    # Cells of each square, split by row and by column of the square
+    square_rows: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+        tuple(squares[square][i * block:(i + 1) * block] for i in range(block)) for square in range(size)
+    )
+    square_columns: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+        tuple(squares[square][i::block] for i in range(block)) for square in range(size)
+    )
+    # Squares crossed by each row and by each column
+    squares_of_row: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(sorted({square_of[index] for index in rows[row]})) for row in range(size)
+    )
+    squares_of_column: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(sorted({square_of[index] for index in columns[column]})) for column in range(size)
+    )
+    return Tables(
+        size, block, cells, row_of, column_of, square_of, rows, columns, squares, units, units_of, peers,
+        square_origin, square_rows, square_columns, squares_of_row, squares_of_column
+    )
+
+
+SIZE = 9
+BLOCK = 3
+
+_TABLES = get_tables(SIZE)
+CELLS = _TABLES.cells
+ROW_OF = _TABLES.row_of
+COLUMN_OF = _TABLES.column_of
+SQUARE_OF = _TABLES.square_of
+ROWS = _TABLES.rows
+COLUMNS = _TABLES.columns
+SQUARES = _TABLES.squares
+UNITS = _TABLES.units
+UNITS_OF = _TABLES.units_of
+PEERS = _TABLES.peers
+SQUARE_ORIGIN = _TABLES.square_origin
+SQUARE_ROWS = _TABLES.square_rows
+SQUARE_COLUMNS = _TABLES.square_columns
+SQUARES_OF_ROW = _TABLES.squares_of_row
+SQUARES_OF_COLUMN = _TABLES.squares_of_column
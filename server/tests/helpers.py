@@ -0,0 +1,9 @@
+from sudoku import Sudoku
+
+
+def solution(grid):
+    """Returns the solution of a grid in the format of Sudoku.load_grid_string(), as found by Sudoku.solve()."""
+    s = Sudoku()
+    s.load_grid_string(grid)
+    s.solve()
+    return s.grid_string()
@@ -0,0 +1,94 @@
+import time
+from unittest import TestCase
+
+from batch import count_grid, count_many, map_chunks, solve_many, solve_grid
+from data import grids
+from sudoku import Sudoku
+
+
+def _square_chunk(chunk):
+    return [(index, item * item) for index, item in chunk]
+
+
+def _slow_chunk(chunk):
+    time.sleep(0.1)
+    return _square_chunk(chunk)
+
+
+class BatchTestCase(TestCase):
+    def setUp(self):
+        self.indexes = list(grids)
+        self.grids = [grids[index]['grid'] for index in self.indexes] * 3
+
+    def assertResults(self, results):
+        self.assertEqual(len(self.grids), len(results))
+        for result in results:
+            index = self.indexes[result.index % len(self.indexes)]
+            self.assertEqual(self.grids[result.index], result.grid)
+            self.assertEqual(grids[index]['summary'], result.summary)
+            self.assertNotIn(' ', result.solution)
+
+    def test_solve_grid(self):
+        result = solve_grid(3, grids[125602]['grid'])
+        s = Sudoku()
+        s.load_grid(125602)
+        s.solve()
+        self.assertEqual(3, result.index)
+        self.assertEqual(s.grid_string(), result.solution)
+        self.assertEqual(grids[125602]['summary'], result.summary)
+
+    def test_solve_grid_invalid(self):
+        result = solve_grid(0, '11' + ' ' * 79)
+        self.assertEqual(None, result.solution)
+        self.assertEqual(None, result.summary)
+
+    def test_solve_many_in_process(self):
+        results = list(solve_many(iter(self.grids), workers=0, chunk_size=4))
+        self.assertEqual(list(range(len(self.grids))), [r.index for r in results])
+        self.assertResults(results)
+
+    def test_solve_many_ordered(self):
+        results = list(solve_many(iter(self.grids), workers=2, chunk_size=2, max_pending=3))
+        self.assertEqual(list(range(len(self.grids))), [r.index for r in results])
+        self.assertResults(results)
+
+    def test_solve_many_unordered(self):
+        results = list(solve_many(iter(self.grids), workers=2, chunk_size=5, ordered=False))
+        self.assertEqual(list(range(len(self.grids))), sorted(r.index for r in results))
+        self.assertResults(results)
+
+    def test_chunk_size(self):
+        with self.assertRaises(ValueError):
+            solve_many(self.grids, chunk_size=0)
+        with self.assertRaises(ValueError):
+            solve_many(self.grids, workers=1, max_pending=0)
+        with self.assertRaises(ValueError):
+            count_many(self.grids, workers=0, chunk_size=0)
+
+    def test_map_chunks(self):
+        expected = [(i, i * i) for i in range(7)]
+        self.assertEqual(expected, list(map_chunks(_square_chunk, range(7), workers=0, chunk_size=3)))
+        self.assertEqual(expected, list(map_chunks(_square_chunk, iter(range(7)), workers=2, chunk_size=2)))
+
+    def test_map_chunks_close(self):
+        results = map_chunks(_slow_chunk, range(40), workers=1, chunk_size=1, max_pending=40)
+        self.assertEqual((0, 0), next(results))
+        # The chunks not started yet are cancelled rather than run
+        start = time.perf_counter()
+        results.close()
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_count_grid(self):
+        self.assertEqual((3, grids[125602]['grid'], 1), count_grid(3, grids[125602]['grid']))
+        self.assertEqual(0, count_grid(0, '11' + ' ' * 79).count)
+        self.assertEqual(2, count_grid(0, ' ' * 81).count)
+        self.assertEqual(4, count_grid(0, ' ' * 81, limit=4).count)
+
+    def test_count_many(self):
+        results = list(count_many(iter(self.grids), workers=0, chunk_size=4))
+        self.assertEqual(list(range(len(self.grids))), [r.index for r in results])
+        self.assertEqual([1] * len(self.grids), [r.count for r in results])
+        results = list(count_many(iter(self.grids[:4] + [' ' * 81]), limit=3, workers=2, chunk_size=2))
+        self.assertEqual([1, 1, 1, 1, 3], [r.count for r in results])
+        with self.assertRaises(ValueError):
+            list(count_many(self.grids, limit=0))
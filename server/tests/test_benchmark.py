@@ -0,0 +1,71 @@
+import random
+from unittest import TestCase
+
+from benchmark import percentile, latency_stats, transform_grid, generated_corpus, difficulty_buckets, \
+    run_benchmark, compare, TIMED_STRATEGIES
+from data import grids
+from sudoku import PROFILED_METHODS, Sudoku
+
+
+class BenchmarkTestCase(TestCase):
+    def test_percentile(self):
+        values = [x for x in range(1, 101)]
+        random.Random(0).shuffle(values)
+        self.assertEqual(50, percentile(values, 0.5))
+        self.assertEqual(99, percentile(values, 0.99))
+        self.assertEqual(1, percentile(values, 0))
+        self.assertEqual(7, percentile([7], 0.99))
+        self.assertEqual(0.0, percentile([], 0.5))
+
+    def test_latency_stats(self):
+        stats = latency_stats([0.001, 0.003])
+        self.assertEqual(2, stats['count'])
+        self.assertAlmostEqual(500.0, stats['per_second'])
+        self.assertAlmostEqual(2000.0, stats['mean_us'])
+        self.assertAlmostEqual(1000.0, stats['p50_us'])
+        self.assertAlmostEqual(3000.0, stats['p99_us'])
+
+    def test_transform_grid(self):
+        grid = grids[327085]['grid']
+        transformed = transform_grid(grid, random.Random(3))
+        self.assertEqual(grid.count(' '), transformed.count(' '))
+        s = Sudoku()
+        s.load_grid_string(transformed)
+        s.solve()
+        self.assertTrue(s.solved())
+
+    def test_generated_corpus(self):
+        corpus = generated_corpus(20, seed=1)
+        self.assertEqual(20, len(corpus))
+        self.assertEqual(corpus, generated_corpus(20, seed=1))
+
+    def test_difficulty_buckets(self):
+        buckets = difficulty_buckets()
+        self.assertEqual(len(grids), sum(len(bucket) for bucket in buckets.values()))
+        self.assertEqual([grids[125602]['grid']], buckets['FACILE'])
+
+    def test_run_benchmark(self):
+        results = run_benchmark({'small': generated_corpus(3)})
+        bucket = results['buckets']['small']
+        self.assertEqual(3, bucket['puzzles'])
+        self.assertEqual(3, bucket['solve']['count'])
+        self.assertEqual(set(TIMED_STRATEGIES), set(bucket['strategies']))
+        # Every strategy of the solver is timed
+        self.assertEqual({name for name in PROFILED_METHODS if name.startswith('_check_')}, set(TIMED_STRATEGIES))
+        self.assertLessEqual(
+            bucket['strategies']['_check_cell_singleton']['hits'],
+            bucket['strategies']['_check_cell_singleton']['count']
+        )
+        self.assertGreater(bucket['allocations']['peak_bytes_mean'], 0)
+
+    def test_compare(self):
+        def results(per_second, p99_us, peak):
+            return {'buckets': {'b': {
+                'solve': {'per_second': per_second, 'p99_us': p99_us},
+                'allocations': {'peak_bytes_mean': peak},
+            }}}
+
+        baseline = results(1000.0, 2000.0, 10000.0)
+        self.assertEqual([], compare(results(950.0, 2100.0, 10500.0), baseline, 0.1))
+        self.assertEqual(3, len(compare(results(800.0, 2500.0, 12000.0), baseline, 0.1)))
+        self.assertEqual([], compare(results(800.0, 2500.0, 12000.0), {'buckets': {}}, 0.1))
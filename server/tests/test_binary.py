@@ -0,0 +1,106 @@
+import mmap
+import os
+import pickle
+import tempfile
+from array import array
+from unittest import TestCase
+
+from binary import candidates_view, dumps, iter_changes, loads, pack_candidates, pack_cells, pack_change, \
+    pack_changes, unpack_cells, unpack_change
+from constants import ChangeType
+from data import grids
+from sudoku import Change, Sudoku
+
+
+def solved(index):
+    s = Sudoku()
+    s.load_grid(index)
+    s.solve()
+    return s
+
+
+class BinaryTestCase(TestCase):
+    def test_cells(self):
+        s = Sudoku()
+        s.load_grid(327085)
+        packed = pack_cells(s._cell)
+        self.assertEqual(41, len(packed))
+        self.assertEqual(s._cell, unpack_cells(packed))
+        self.assertEqual(s._cell, unpack_cells(memoryview(packed + b'rest')))
+        s = Sudoku(16)
+        s._cell[255] = 16
+        packed = pack_cells(s._cell)
+        self.assertEqual(256, len(packed))
+        self.assertEqual(s._cell, unpack_cells(packed, 256))
+
+    def test_candidates(self):
+        s = Sudoku()
+        s.load_grid(41430)
+        s.solve(use_search=False)
+        packed = pack_candidates(s._candidates)
+        self.assertEqual(162, len(packed))
+        view = candidates_view(packed)
+        self.assertEqual(list(s._candidates), list(view))
+        # The view reads the buffer in place
+        buffer = bytearray(packed)
+        view = candidates_view(buffer)
+        buffer[0:2] = array('H', [0b101]).tobytes()
+        self.assertEqual(0b101, view[0])
+
+    def test_change(self):
+        change = Change(ChangeType.DEFINE, {'row': 4, 'column': 6, 'value': 7}, 20)
+        packed = pack_change(change)
+        self.assertEqual(5, len(packed))
+        self.assertEqual((change, 5), unpack_change(packed))
+        change = Change(ChangeType.SEARCH, {'nodes': 100000}, 300)
+        self.assertEqual(change, unpack_change(pack_change(change))[0])
+
+    def test_changes(self):
+        for index in grids:
+            changes = solved(index)._changes
+            packed = pack_changes(changes)
+            self.assertEqual(changes, list(iter_changes(packed)))
+            self.assertLess(len(packed), len(pickle.dumps(changes)) / 4)
+        change = Change(ChangeType.SQUARE_SUB_SET, {'square': (3, 3), 'sub_set': {2, 5}, 'removed': [(3, 4, 2)]}, 1)
+        self.assertEqual([change], list(iter_changes(pack_change(change))))
+
+    def test_dumps_loads(self):
+        s = Sudoku()
+        s.load_grid(513089)
+        s.solve(use_search=False)
+        state = dumps(s)
+        self.assertEqual(b'SDK', state[:3])
+        loaded = loads(state)
+        self.assertEqual(s._cell, loaded._cell)
+        self.assertEqual(s._candidates, loaded._candidates)
+        self.assertEqual(s._changes, loaded._changes)
+        self.assertEqual(s.change_summary(), loaded.change_summary())
+        # The loaded grid can be undone and solved as the original one
+        self.assertEqual(s.undo(), loaded.undo())
+        self.assertEqual(s.snapshot().candidates, loaded.snapshot().candidates)
+        s.solve()
+        loaded.solve()
+        self.assertEqual(s.grid_string(), loaded.grid_string())
+        with self.assertRaises(ValueError):
+            loads(b'XYZ' + state[3:])
+        with self.assertRaises(ValueError):
+            dumps(Sudoku(history=False))
+
+    def test_loads_mmap(self):
+        s = solved(41430)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state')
+            with open(path, 'wb') as f:
+                f.write(dumps(s))
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                loaded = loads(buffer)
+        self.assertEqual(s.grid_string(), loaded.grid_string())
+        self.assertEqual(s.change_summary(), loaded.change_summary())
+
+    def test_size_16(self):
+        s = Sudoku(16)
+        s.define_cell(0, 0, 16)
+        loaded = loads(dumps(s))
+        self.assertEqual(16, loaded.SIZE)
+        self.assertEqual(16, loaded.cell(0, 0))
+        self.assertEqual(s._candidates, loaded._candidates)
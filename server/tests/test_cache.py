@@ -0,0 +1,101 @@
+import os
+import random
+import sqlite3
+import tempfile
+from unittest import TestCase
+
+from benchmark import transform_grid
+from cache import FLUSH_SIZE, SolutionCache
+from data import grids
+from tests.helpers import solution
+
+
+class SolutionCacheTestCase(TestCase):
+    def test_solve(self):
+        rnd = random.Random(0)
+        with SolutionCache() as cache:
+            for index in grids:
+                grid = grids[index]['grid']
+                self.assertEqual(solution(grid), cache.solve(grid))
+            self.assertEqual(len(grids), cache.misses)
+            self.assertEqual(len(grids), len(cache))
+            # Equivalent grids hit the cache, and get their own solution
+            for index in grids:
+                grid = transform_grid(grids[index]['grid'], rnd)
+                self.assertEqual(solution(grid), cache.solve(grid))
+            self.assertEqual(len(grids), cache.hits)
+            self.assertEqual(len(grids), len(cache))
+
+    def test_get_put(self):
+        grid = grids[327085]['grid']
+        with SolutionCache() as cache:
+            self.assertIsNone(cache.get(grid))
+            cache.put(grid, solution(grid))
+            other = transform_grid(grid, random.Random(1))
+            self.assertEqual(solution(other), cache.get(other))
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_no_solution(self):
+        grid = '12345678' + ' ' * 72 + '9'
+        with SolutionCache() as cache:
+            self.assertIsNone(cache.solve(grid))
+            self.assertEqual(0, len(cache))
+            with self.assertRaises(ValueError):
+                cache.solve('11' + ' ' * 79)
+
+    def test_eviction(self):
+        indexes = sorted(grids)
+        with SolutionCache(max_entries=3) as cache:
+            for index in indexes[:3]:
+                cache.solve(grids[index]['grid'])
+            # Use the first grid again: the second one is now the least recently used
+            cache.solve(grids[indexes[0]]['grid'])
+            cache.solve(grids[indexes[3]]['grid'])
+            self.assertEqual(3, len(cache))
+            self.assertIsNotNone(cache.get(grids[indexes[0]]['grid']))
+            self.assertIsNone(cache.get(grids[indexes[1]]['grid']))
+            self.assertIsNotNone(cache.get(grids[indexes[2]]['grid']))
+        with self.assertRaises(ValueError):
+            SolutionCache(max_entries=0)
+
+    def test_persistence(self):
+        grid = grids[41430]['grid']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            with SolutionCache(path) as cache:
+                cache.solve(grid)
+            with SolutionCache(path) as cache:
+                self.assertEqual(1, len(cache))
+                self.assertEqual(solution(grid), cache.get(grid))
+
+    def test_recency(self):
+        indexes = sorted(grids)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+
+            def used():
+                connection = sqlite3.connect(path)
+                try:
+                    return dict(connection.execute('SELECT grid, used FROM solutions').fetchall())
+                finally:
+                    connection.close()
+
+            with SolutionCache(path, max_entries=2) as cache:
+                for index in indexes[:2]:
+                    cache.solve(grids[index]['grid'])
+                written = used()
+                # Hits do not write to the file
+                cache.get(grids[indexes[0]]['grid'])
+                self.assertEqual(written, used())
+            # Their recency is written on close
+            self.assertGreater(max(used().values()), max(written.values()))
+            with SolutionCache(path, max_entries=2) as cache:
+                # The second grid is the least recently used, and is evicted
+                cache.solve(grids[indexes[2]]['grid'])
+                self.assertIsNotNone(cache.get(grids[indexes[0]]['grid']))
+                self.assertIsNone(cache.get(grids[indexes[1]]['grid']))
+                # Or once enough hits are kept in memory
+                written = used()
+                for _ in range(FLUSH_SIZE):
+                    cache.get(grids[indexes[0]]['grid'])
+                self.assertNotEqual(written, used())
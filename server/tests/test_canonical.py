@@ -0,0 +1,61 @@
+import random
+from unittest import TestCase
+
+from benchmark import transform_grid
+from canonical import apply, canonical_form, canonical_hash, canonical_transform, deduplicate, equivalent, invert
+from data import grids
+
+
+class CanonicalTestCase(TestCase):
+    def test_canonical_form(self):
+        rnd = random.Random(0)
+        forms = set()
+        for index in grids:
+            grid = grids[index]['grid']
+            canonical = canonical_form(grid)
+            forms.add(canonical)
+            self.assertEqual(grid.count(' '), canonical.count(' '))
+            for _ in range(5):
+                self.assertEqual(canonical, canonical_form(transform_grid(grid, rnd)))
+        # Grids of data.grids are not equivalent
+        self.assertEqual(len(grids), len(forms))
+
+    def test_canonical_form_labels(self):
+        canonical = canonical_form(' ' * 79 + '57')
+        self.assertEqual(' ' * 79 + '12', canonical)
+        # Values in the same stack of two rows of a band
+        canonical = canonical_form('9' + ' ' * 9 + '3' + ' ' * 70)
+        self.assertEqual(' ' * 71 + '1' + ' ' * 7 + '2 ', canonical)
+        self.assertEqual(canonical, canonical_form('8' + ' ' * 10 + '6' + ' ' * 69))
+
+    def test_transform(self):
+        rnd = random.Random(1)
+        for index in grids:
+            grid = transform_grid(grids[index]['grid'], rnd)
+            canonical, transform = canonical_transform(grid)
+            self.assertEqual(canonical, apply(grid, transform))
+            self.assertEqual(grid, invert(canonical, transform))
+            self.assertEqual(set('123456789'), set(transform.labels))
+
+    def test_canonical_hash(self):
+        grid = grids[41430]['grid']
+        other = transform_grid(grid, random.Random(2))
+        self.assertEqual(32, len(canonical_hash(grid)))
+        self.assertEqual(canonical_hash(grid), canonical_hash(other))
+        self.assertNotEqual(canonical_hash(grid), canonical_hash(grids[513089]['grid']))
+        self.assertTrue(equivalent(grid, other))
+        self.assertFalse(equivalent(grid, grids[513089]['grid']))
+
+    def test_deduplicate(self):
+        rnd = random.Random(3)
+        originals = [grids[index]['grid'] for index in sorted(grids)]
+        corpus = originals + [transform_grid(grid, rnd) for grid in originals * 3]
+        self.assertEqual(originals, list(deduplicate(corpus)))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            canonical_form(' ' * 80)
+        with self.assertRaises(ValueError):
+            canonical_form('x' + ' ' * 80)
+        with self.assertRaises(ValueError):
+            canonical_form('1' + ' ' * 9 + '1' + ' ' * 70)
@@ -0,0 +1,67 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+from cli import count_stream, main, read_grids, solve_stream
+from data import grids
+from tests.helpers import solution
+
+
+class CliTestCase(TestCase):
+    def test_read_grids(self):
+        lines = ['1.3' + '0' * 78 + '\n', '4 6' + ' ' * 78 + '\r\n', '7.9' + '.' * 78 + ' FACILE\n']
+        self.assertEqual(['1 3' + ' ' * 78, '4 6' + ' ' * 78, '7 9' + ' ' * 78], list(read_grids(lines)))
+
+    def test_solve_stream(self):
+        source = io.StringIO(
+            grids[327085]['grid'].replace(' ', '.') + '\n'
+            + grids[513089]['grid'].replace(' ', '0') + '\n'
+            + '11' + '.' * 79 + '\n'
+        )
+        destination = io.StringIO()
+        report = io.StringIO()
+        failures = solve_stream(source, destination, workers=0, report=report)
+        self.assertEqual(1, failures)
+        self.assertEqual(
+            [solution(grids[327085]['grid']), solution(grids[513089]['grid']), '11' + '.' * 79],
+            destination.getvalue().splitlines()
+        )
+        lines = report.getvalue().splitlines()
+        self.assertEqual('Line 3: no solution', lines[0])
+        self.assertTrue(lines[1].startswith('3 puzzles in '))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'puzzles.txt')
+            output_path = os.path.join(directory, 'solutions.txt')
+            with open(input_path, 'w') as f:
+                for index in grids:
+                    f.write(grids[index]['grid'].replace(' ', '.') + '\n')
+            self.assertEqual(0, main([input_path, '-o', output_path, '-w', '0', '-q']))
+            with open(output_path) as f:
+                self.assertEqual([solution(grids[index]['grid']) for index in grids], f.read().splitlines())
+
+    def test_count_stream(self):
+        source = io.StringIO(
+            grids[327085]['grid'].replace(' ', '.') + '\n'
+            + '.' * 81 + '\n'
+            + '11' + '.' * 79 + '\n'
+        )
+        destination = io.StringIO()
+        report = io.StringIO()
+        self.assertEqual(2, count_stream(source, destination, workers=0, report=report))
+        self.assertEqual(['1', '2', '0'], destination.getvalue().splitlines())
+        lines = report.getvalue().splitlines()
+        self.assertEqual(['Line 2: several solutions', 'Line 3: no solution'], lines[:2])
+        self.assertTrue(lines[2].endswith('2 without a unique solution'))
+
+    def test_main_count(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'puzzles.txt')
+            output_path = os.path.join(directory, 'counts.txt')
+            with open(input_path, 'w') as f:
+                f.write('.' * 81 + '\n')
+            self.assertEqual(1, main([input_path, '-o', output_path, '-w', '0', '-q', '--count', '--limit', '3']))
+            with open(output_path) as f:
+                self.assertEqual('3\n', f.read())
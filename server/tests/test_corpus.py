@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+from corpus import Corpus, main, read_puzzles, write_corpus
+from data import grids, Difficulty
+from sudoku import Sudoku
+
+
+class CorpusTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'puzzles.corpus')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_data(self):
+        puzzles = [(index, grid['grid'], grid['difficulty']) for index, grid in grids.items()]
+        return write_corpus(self.path, puzzles)
+
+    def test_grids(self):
+        self.assertEqual(len(grids), self.write_data())
+        # Fixed-width records follow the index
+        self.assertLess(os.path.getsize(self.path), 64 + len(grids) * (81 + 8 + 4 + 1) + 1)
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(grids), len(corpus))
+            self.assertEqual(sorted(grids), list(corpus))
+            for index, grid in grids.items():
+                self.assertIn(index, corpus)
+                self.assertEqual(grid['grid'], corpus.grid(index))
+                self.assertEqual(grid['difficulty'], corpus.difficulty(index))
+            self.assertNotIn(1, corpus)
+            with self.assertRaises(KeyError):
+                corpus.grid(1)
+
+    def test_difficulty_index(self):
+        self.write_data()
+        with Corpus(self.path) as corpus:
+            for difficulty in Difficulty:
+                expected = sorted(index for index, grid in grids.items() if grid['difficulty'] == difficulty)
+                self.assertEqual(len(expected), corpus.count(difficulty))
+                self.assertEqual(expected, list(corpus.ids(difficulty)))
+                self.assertEqual(expected, [corpus.id_at(difficulty, rank) for rank in range(len(expected))])
+            self.assertEqual(0, corpus.count(None))
+            with self.assertRaises(IndexError):
+                corpus.id_at(Difficulty.FACILE, corpus.count(Difficulty.FACILE))
+
+    def test_load_grid(self):
+        self.write_data()
+        with Corpus(self.path) as corpus:
+            for index in grids:
+                s = Sudoku()
+                s.load_grid(index, corpus)
+                expected = Sudoku()
+                expected.load_grid(index)
+                self.assertEqual(expected.grid_string(), s.grid_string())
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            write_corpus(self.path, [(1, ' ' * 81, None), (1, ' ' * 81, None)])
+        with self.assertRaises(ValueError):
+            write_corpus(self.path, [(1, ' ' * 80, None)])
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            Corpus(self.path)
+
+    def test_size_16(self):
+        grid = 'G' + ' ' * 255
+        write_corpus(self.path, [(7, grid, None)], 16)
+        with Corpus(self.path) as corpus:
+            self.assertEqual(16, corpus.size)
+            s = Sudoku(16)
+            s.load_grid(7, corpus)
+            self.assertEqual(16, s.cell(0, 0))
+
+    def test_read_puzzles(self):
+        lines = io.StringIO('1' + '.' * 80 + ' FACILE\n\n' + '0' * 81 + '\n')
+        self.assertEqual([(1, '1' + ' ' * 80, Difficulty.FACILE), (3, ' ' * 81, None)], list(read_puzzles(lines)))
+
+    def test_main(self):
+        source = os.path.join(self.directory.name, 'puzzles.txt')
+        with open(source, 'w') as f:
+            for grid in grids.values():
+                f.write(f'{grid["grid"].replace(" ", ".")} {grid["difficulty"].name}\n')
+        self.assertEqual(0, main([source, '-o', self.path]))
+        with Corpus(self.path) as corpus:
+            self.assertEqual([grid['grid'] for grid in grids.values()], [corpus.grid(i) for i in corpus])
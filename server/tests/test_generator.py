@@ -0,0 +1,65 @@
+import io
+import random
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from cli import read_grids
+from data import grids, Difficulty
+from generator import generate, generate_many, grade, main, minimal_puzzle, random_solution
+from sudoku import Sudoku
+from tables import UNITS
+
+
+class GeneratorTestCase(TestCase):
+    def test_grade(self):
+        for index in grids:
+            self.assertEqual(grids[index]['difficulty'], grade(grids[index]['summary']))
+
+    def test_random_solution(self):
+        solution = random_solution(random.Random(1))
+        for unit in UNITS:
+            self.assertEqual(set(range(1, 10)), {solution[index] for index in unit})
+        self.assertNotEqual(solution, random_solution(random.Random(2)))
+
+    def test_minimal_puzzle(self):
+        rnd = random.Random(3)
+        solution = random_solution(rnd)
+        cells = minimal_puzzle(solution, rnd)
+        grid = ''.join(' ' if value is None else str(value) for value in cells)
+        s = Sudoku()
+        s.load_grid_string(grid)
+        self.assertEqual(1, s.count_solutions())
+        # Removing any clue gives several solutions
+        for index, value in enumerate(cells):
+            if value is not None:
+                s = Sudoku()
+                s.load_grid_string(grid[:index] + ' ' + grid[index + 1:])
+                self.assertEqual(2, s.count_solutions())
+
+    def test_generate(self):
+        puzzle = generate(random.Random(4))
+        s = Sudoku()
+        s.load_grid_string(puzzle.grid)
+        s.solve()
+        self.assertEqual(puzzle.solution, s.grid_string())
+        self.assertEqual(puzzle.summary, s.change_summary())
+        self.assertEqual(grade(puzzle.summary), puzzle.difficulty)
+
+    def test_generate_many(self):
+        puzzles = list(generate_many(5, seed=10, workers=0, chunk_size=2))
+        self.assertEqual(5, len(puzzles))
+        self.assertEqual(puzzles, list(generate_many(5, seed=10, workers=2, chunk_size=3)))
+        band = {Difficulty.DIFFICILE, Difficulty.DIABOLIQUE}
+        puzzles = list(generate_many(3, band, workers=0))
+        self.assertEqual(3, len(puzzles))
+        self.assertTrue(all(puzzle.difficulty in band for puzzle in puzzles))
+
+    def test_main(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(0, main(['2', '--seed', '10', '--workers', '0']))
+        puzzles = list(generate_many(2, seed=10, workers=0))
+        lines = output.getvalue().splitlines()
+        self.assertEqual([puzzle.difficulty.name for puzzle in puzzles], [line.split()[-1] for line in lines])
+        # The solver reads the grids back, without their difficulty
+        self.assertEqual([puzzle.grid for puzzle in puzzles], list(read_grids(lines)))
@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from search import search, count
+from tables import UNITS
+
+
+def parse(grid):
+    return [None if x == '.' else int(x) for x in grid]
+
+
+class SearchTestCase(TestCase):
+    def assertValidSolution(self, cells, solution):
+        for index, value in enumerate(cells):
+            if value is not None:
+                self.assertEqual(value, solution[index])
+        for unit in UNITS:
+            self.assertEqual(set(range(1, 10)), {solution[index] for index in unit})
+
+    def test_search_17_clues(self):
+        cells = parse(
+            "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"
+        )
+        solution, nodes = search(cells, [0b111111111] * 81)
+        self.assertValidSolution(cells, solution)
+        self.assertGreater(nodes, 0)
+
+    def test_search_singles_only(self):
+        # Solved by naked and hidden singles, without branching
+        cells = parse(
+            "..16..3...8.94......7..34...1........9.486.5........8...42..1......57.9...9..47.."
+        )
+        solution, nodes = search(cells, [0b111111111] * 81)
+        self.assertValidSolution(cells, solution)
+        self.assertEqual(0, nodes)
+
+    def test_search_uses_candidates(self):
+        cells = [None] * 81
+        candidates = [0b111111111] * 81
+        # Only value 5 is left in the first cell
+        candidates[0] = 0b000010000
+        solution, _ = search(cells, candidates)
+        self.assertEqual(5, solution[0])
+        self.assertValidSolution(cells, solution)
+
+    def test_search_contradiction(self):
+        cells = [None] * 81
+        cells[0] = 1
+        cells[1] = 1
+        self.assertEqual((None, 0), search(cells, [0b111111111] * 81))
+
+        cells = [None] * 81
+        candidates = [0b111111111] * 81
+        candidates[40] = 0
+        self.assertEqual((None, 0), search(cells, candidates))
+
+    def test_search_no_solution(self):
+        # Row 0 needs a 9 in one of its last two cells, which both see a 9
+        cells = parse(
+            "12345678." "........." "........." "........9" "........." "........." "........." "........." "........."
+        )
+        solution, _ = search(cells, [0b111111111] * 81)
+        self.assertEqual(None, solution)
+
+    def test_count(self):
+        cells = [None] * 81
+        candidates = [0b111111111] * 81
+        self.assertEqual(2, count(cells, candidates))
+        self.assertEqual(5, count(cells, candidates, limit=5))
+        cells[0] = 1
+        cells[1] = 1
+        self.assertEqual(0, count(cells, candidates))
+        cells = parse(
+            "12345678." "........." "........." "........9" "........." "........." "........." "........." "........."
+        )
+        self.assertEqual(0, count(cells, candidates))
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from data import grids
+from service import solve_request, SolveService
+from tests.helpers import solution
+
+
+async def http_request(port, method, path, body=b'', headers=''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n{headers}\r\n'.encode()
+        + body
+    )
+    status, response_headers, content = await read_response(reader)
+    writer.close()
+    return status, response_headers, content
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.lower()] = value.strip()
+    content = await reader.readexactly(int(headers['content-length']))
+    return status, headers, json.loads(content)
+
+
+class SolveRequestTestCase(TestCase):
+    def test_solve_request(self):
+        result = solve_request(grids[327085]['grid'].replace(' ', '.'))
+        self.assertEqual(grids[327085]['grid'], result['grid'])
+        self.assertEqual(solution(grids[327085]['grid']), result['solution'])
+        self.assertEqual({t.name: stats for t, stats in grids[327085]['summary'].items()}, result['summary'])
+        self.assertEqual({'grid': '123', 'error': 'Grid must have 81 cells'}, solve_request('123'))
+        result = solve_request('11' + ' ' * 79)
+        self.assertEqual('Value not compatible with other cells', result['error'])
+
+
+class SolveServiceTestCase(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SolveService(workers=0, batch_size=8)
+        self.server = await self.service.serve('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.service.close()
+
+    async def test_solve(self):
+        results = await asyncio.gather(*(self.service.solve(grids[index]['grid']) for index in grids))
+        self.assertEqual([solution(entry['grid']) for entry in grids.values()],
+                         [result['solution'] for result in results])
+        # Grids queued together are solved in the same batch
+        self.assertLess(self.service.batches, len(grids))
+        self.assertEqual(len(grids), self.service.solved)
+
+    async def test_http(self):
+        body = json.dumps({'grid': grids[513089]['grid']}).encode()
+        status, headers, response = await http_request(self.port, 'POST', '/solve', body)
+        self.assertEqual(200, status)
+        self.assertEqual('application/json', headers['content-type'])
+        self.assertEqual(solution(grids[513089]['grid']), response['solution'])
+        self.assertEqual(1, response['summary']['SEARCH']['count'])
+
+        body = json.dumps({'grids': [grids[327085]['grid'], '123']}).encode()
+        status, _, response = await http_request(self.port, 'POST', '/solve', body)
+        self.assertEqual(200, status)
+        self.assertEqual(solution(grids[327085]['grid']), response['results'][0]['solution'])
+        self.assertEqual('Grid must have 81 cells', response['results'][1]['error'])
+
+        status, _, response = await http_request(self.port, 'GET', '/health')
+        self.assertEqual(200, status)
+        self.assertEqual('ok', response['status'])
+        self.assertEqual(3, response['solved'])
+
+    async def test_http_errors(self):
+        self.assertEqual(400, (await http_request(self.port, 'POST', '/solve', b'{"grid": 1}'))[0])
+        self.assertEqual(400, (await http_request(self.port, 'POST', '/solve', b'not json'))[0])
+        self.assertEqual(404, (await http_request(self.port, 'GET', '/grids'))[0])
+        self.assertEqual(405, (await http_request(self.port, 'GET', '/solve'))[0])
+        status, headers, _ = await http_request(self.port, 'POST', '/solve', headers='Content-Length: 99999999\r\n')
+        self.assertEqual(413, status)
+        self.assertEqual('close', headers['connection'])
+
+    async def test_http_keep_alive(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        for index in (327085, 125602):
+            body = json.dumps({'grid': grids[index]['grid']}).encode()
+            writer.write(f'POST /solve HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+            status, headers, response = await read_response(reader)
+            self.assertEqual(200, status)
+            self.assertEqual('keep-alive', headers['connection'])
+            self.assertEqual(solution(grids[index]['grid']), response['solution'])
+        writer.close()
+
+    async def test_line_protocol(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        indexes = list(grids) * 3
+        # Every line is sent before any result is read
+        writer.write(''.join(grids[index]['grid'].replace(' ', '.') + '\n' for index in indexes).encode())
+        writer.write(b'123\n')
+        writer.write_eof()
+        results = [json.loads(line) for line in (await reader.read()).splitlines()]
+        self.assertEqual([solution(grids[index]['grid']) for index in indexes],
+                         [result['solution'] for result in results[:-1]])
+        self.assertEqual('Grid must have 81 cells', results[-1]['error'])
+        writer.close()
+
+    async def test_many_clients(self):
+        async def client(index):
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            writer.write(grids[index]['grid'].encode() + b'\n')
+            result = json.loads(await reader.readline())
+            writer.close()
+            return result['solution']
+
+        indexes = list(grids) * 50
+        self.assertEqual([solution(grids[index]['grid']) for index in indexes],
+                         await asyncio.gather(*(client(index) for index in indexes)))
+
+    async def test_close(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(grids[327085]['grid'].encode() + b'\n')
+        self.assertEqual(solution(grids[327085]['grid']), json.loads(await reader.readline())['solution'])
+        # The connection is still open: closing the service ends it
+        await asyncio.wait_for(self.service.close(), 5)
+        self.assertEqual(b'', await reader.read())
+        writer.close()
+
+
+class BackpressureTestCase(IsolatedAsyncioTestCase):
+    async def test_bounded_queue(self):
+        async with SolveService(workers=0, batch_size=2, max_queued=4) as service:
+            tasks = [asyncio.create_task(service.solve(grids[327085]['grid'])) for _ in range(40)]
+            await asyncio.sleep(0)
+            # Grids beyond the queue wait for room instead of piling up
+            self.assertLessEqual(service.health()['queued'], 4)
+            results = await asyncio.gather(*tasks)
+        self.assertEqual({solution(grids[327085]['grid'])}, {result['solution'] for result in results})
+
+    async def test_workers(self):
+        async with SolveService(workers=2, batch_size=4) as service:
+            results = await asyncio.gather(*(service.solve(grids[index]['grid']) for index in grids))
+        self.assertEqual([solution(entry['grid']) for entry in grids.values()],
+                         [result['solution'] for result in results])
+
+    def test_arguments(self):
+        with self.assertRaises(ValueError):
+            SolveService(batch_size=0)
+        with self.assertRaises(ValueError):
+            SolveService(max_queued=0)
@@ -2,17 +2,26 @@ from unittest import TestCase
 
 from constants import ChangeType
 from data import grids
-from sudoku import Sudoku, Change
+from sudoku import Sudoku, Change, Mark, PROFILED_METHODS
+from tables import UNITS
 
 
 class SudokuTestCase(TestCase):
     def test_init(self):
         s = Sudoku()
-        self.assertEqual(9, len(s._cell))
-        self.assertEqual(9, len(s._cell[5]))
-        self.assertEqual(9, len(s._options[6][7]))
+        self.assertEqual(81, len(s._cell))
+        self.assertEqual(None, s.cell(5, 8))
+        self.assertEqual(9, len(s.options(6, 7)))
         self.assertEqual([], s._changes)
 
+    def test_options(self):
+        s = Sudoku()
+        s._set_options(3, 5, [2, 7, 4])
+        self.assertEqual([2, 4, 7], s.options(3, 5))
+        self.assertEqual(0b1001010, s._candidates[3 * 9 + 5])
+        s._set_options(3, 5, [])
+        self.assertEqual([], s.options(3, 5))
+
     def test_string(self):
         s = Sudoku()
         s.define_cell(4, 6, 7)
@@ -33,7 +42,7 @@ class SudokuTestCase(TestCase):
             str(s))
 
     def test_cells_in_square(self):
-        cells = Sudoku._cells_in_square(4, 6)
+        cells = Sudoku()._cells_in_square(4, 6)
         self.assertEqual(
             [(3, 6), (3, 7), (3, 8), (4, 6), (4, 7), (4, 8), (5, 6), (5, 7), (5, 8)],
             cells
@@ -42,17 +51,27 @@ class SudokuTestCase(TestCase):
     def test_load_grid(self):
         s = Sudoku()
         s.load_grid(327085)
-        self.assertEqual(7, s._cell[1][0])
+        self.assertEqual(7, s.cell(1, 0))
         summary = s.change_summary()
         self.assertEqual(28, summary[ChangeType.DEFINE]['count'])
         self.assertEqual(546, summary[ChangeType.DEFINE]['removed'])
 
+    def test_load_grid_string(self):
+        s = Sudoku()
+        s.load_grid_string(grids[327085]['grid'])
+        self.assertEqual(7, s.cell(1, 0))
+        self.assertEqual(grids[327085]['grid'], s.grid_string())
+        self.assertEqual(28, s.change_summary()[ChangeType.DEFINE]['count'])
+        with self.assertRaises(ValueError) as e:
+            Sudoku().load_grid_string('123')
+        self.assertEqual('Grid must have 81 cells', e.exception.args[0])
+
     def test_define_cell(self):
         s = Sudoku()
-        self.assertEqual(None, s._cell[2][1])
+        self.assertEqual(None, s.cell(2, 1))
         s.define_cell(2, 1, 3)
-        self.assertEqual(3, s._cell[2][1])
-        self.assertEqual(None, s._cell[2][2])
+        self.assertEqual(3, s.cell(2, 1))
+        self.assertEqual(None, s.cell(2, 2))
         self.assertEqual(
             [Change(ChangeType.DEFINE, {'row': 2, 'column': 1, 'value': 3}, 29)],
             s._changes
@@ -78,19 +97,73 @@ class SudokuTestCase(TestCase):
             s.define_cell(1, 1, 1)
         self.assertEqual('Value not compatible with other cells', e.exception.args[0])
 
+    def test_define_cells(self):
+        for index in grids:
+            grid = grids[index]['grid']
+            expected = Sudoku()
+            for position, symbol in enumerate(grid):
+                if symbol != ' ':
+                    expected.define_cell(position // 9, position % 9, int(symbol))
+            s = Sudoku()
+            s.define_cells([None if symbol == ' ' else int(symbol) for symbol in grid])
+            # Same changes and state as defining the cells one by one
+            self.assertEqual(expected._changes, s._changes)
+            self.assertEqual(expected._candidates, s._candidates)
+            self.assertEqual(expected._trail, s._trail)
+            self.assertEqual(sorted(set(expected._singles)), sorted(set(s._singles)))
+            self.assertEqual(expected._cells_scanned, s._cells_scanned)
+            self.assertEqual(expected._dirty, s._dirty)
+            s.solve()
+            self.assertEqual(grids[index]['summary'], s.change_summary())
+            s.undo_to(Mark(0, None))
+            self.assertEqual(Sudoku().snapshot().candidates, s.snapshot().candidates)
+
+        s = Sudoku()
+        s.define_cell(0, 0, 1)
+        values = [None] * 81
+        values[80] = 1
+        values[40] = 5
+        values[44] = 5
+        with self.assertRaises(ValueError) as e:
+            s.define_cells(values)
+        self.assertEqual('Value not compatible with other cells', e.exception.args[0])
+        # Nothing was defined
+        self.assertIsNone(s.cell(8, 8))
+        self.assertEqual(1, len(s._changes))
+        values[44] = None
+        values[0] = 2
+        with self.assertRaises(ValueError) as e:
+            s.define_cells(values)
+        self.assertEqual('This cell already has a value', e.exception.args[0])
+        values[0] = None
+        # Units which changed are scheduled again for the strategies which were done with them
+        expected = Sudoku()
+        expected.define_cell(0, 0, 1)
+        for x in (s, expected):
+            x._check_row_sub_set()
+            x._check_hidden_single()
+        expected.define_cell(4, 4, 5)
+        expected.define_cell(8, 8, 1)
+        s.define_cells(values)
+        self.assertEqual(5, s.cell(4, 4))
+        self.assertEqual(expected._dirty, s._dirty)
+        with self.assertRaises(ValueError) as e:
+            s.load_grid_string('A' + ' ' * 80)
+        self.assertEqual('Value out of range', e.exception.args[0])
+
     def test_remove_options(self):
         s = Sudoku()
         full = [x for x in range(1, 10)]
         reduced = [x for x in range(1, 10) if x != 5]
         removed = s._remove_options(3, 4, 5)
-        self.assertEqual(full, s._options[1][1])
-        self.assertEqual(full, s._options[4][8])
-        self.assertEqual(full, s._options[7][7])
-        self.assertEqual(reduced, s._options[3][1])
-        self.assertEqual(reduced, s._options[8][4])
-        self.assertEqual(reduced, s._options[5][3])
-        self.assertEqual(reduced, s._options[5][5])
-        self.assertEqual([], s._options[3][4])
+        self.assertEqual(full, s.options(1, 1))
+        self.assertEqual(full, s.options(4, 8))
+        self.assertEqual(full, s.options(7, 7))
+        self.assertEqual(reduced, s.options(3, 1))
+        self.assertEqual(reduced, s.options(8, 4))
+        self.assertEqual(reduced, s.options(5, 3))
+        self.assertEqual(reduced, s.options(5, 5))
+        self.assertEqual([], s.options(3, 4))
         self.assertEqual(29, removed)
 
     def test_check_cell_singleton(self):
@@ -103,8 +176,33 @@ class SudokuTestCase(TestCase):
         self.assertEqual(ChangeType.CELL_SINGLETON, r.type)
         self.assertEqual({'row': 0, 'column': 7, 'value': 8}, r.data)
         self.assertEqual(13, r.removed)
-        self.assertEqual(8, s._cell[0][7])
-        self.assertEqual([1, 2, 3, 4, 5, 6], s._options[1][8])
+        self.assertEqual(8, s.cell(0, 7))
+        self.assertEqual([1, 2, 3, 4, 5, 6], s.options(1, 8))
+
+    def test_singles_queue(self):
+        s = Sudoku()
+        for x in range(7):
+            s.define_cell(0, x, x + 1)
+        self.assertEqual([], s._singles)
+        s.define_cell(0, 8, 9)
+        # The cell (0, 7) is queued as soon as it drops to a single option
+        self.assertEqual([7], s._singles)
+        s._check_cell_singleton()
+        self.assertEqual([], s._singles)
+
+    def test_dirty_units(self):
+        s = Sudoku()
+        s.define_cell(4, 4, 5)
+        self.assertIsNone(s._check_row_sub_set())
+        self.assertIsNone(s._check_exclusive_row_in_square())
+        # Units found without exclusive sub-set are not scanned again until one of their cells changes
+        self.assertEqual(bytearray(9), s._dirty[18:27])
+        s._set_options(3, 6, [1, 2])
+        self.assertEqual(bytearray([0, 0, 0, 1, 0, 0, 0, 0, 0]), s._dirty[18:27])
+        self.assertEqual(1, s._dirty[27 + 6])
+        self.assertEqual(1, s._dirty[36 + 5])
+        # Exclusive row checks of squares crossed by the row
+        self.assertEqual(bytearray([0, 0, 0, 1, 1, 1, 0, 0, 0]), s._dirty[0:9])
 
     def test_check_exclusive_row_in_square(self):
         s = Sudoku()
@@ -134,6 +232,80 @@ class SudokuTestCase(TestCase):
             change.data
         )
 
+    def test_check_exclusive_square_in_row(self):
+        s = Sudoku()
+        # In row 2, 1 is only possible in the first square
+        for i in range(3, Sudoku.SIZE):
+            s._set_options(2, i, [2, 3, 4, 5, 6, 7, 8, 9])
+        change = s._check_exclusive_square_in_row()
+        self.assertEqual(ChangeType.EXCLUSIVE_SQUARE_IN_ROW, change.type)
+        self.assertEqual(6, change.removed)
+        self.assertEqual(
+            {'row': 2, 'value': 1, 'exclusive square': (0, 0),
+             'removed': [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]},
+            change.data
+        )
+
+    def test_check_exclusive_square_in_column(self):
+        s = Sudoku()
+        # In column 4, 9 is only possible in the last square
+        for i in range(6):
+            s._set_options(i, 4, [1, 2, 3, 4, 5, 6, 7, 8])
+        change = s._check_exclusive_square_in_column()
+        self.assertEqual(ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN, change.type)
+        self.assertEqual(6, change.removed)
+        self.assertEqual(
+            {'column': 4, 'value': 9, 'exclusive square': (6, 3),
+             'removed': [(6, 3), (6, 5), (7, 3), (7, 5), (8, 3), (8, 5)]},
+            change.data
+        )
+
+    def test_check_hidden_single(self):
+        s = Sudoku()
+        self.assertIsNone(s._check_hidden_single())
+        # 3 is only possible in the cell (2, 5) of row 2
+        for i in range(Sudoku.SIZE):
+            if i != 5:
+                s._set_options(2, i, [1, 2, 4, 5, 6, 7, 8, 9])
+        change = s._check_hidden_single()
+        self.assertEqual(ChangeType.HIDDEN_SINGLE, change.type)
+        self.assertEqual({'row': 2, 'column': 5, 'value': 3, 'unit': 'row'}, change.data)
+        self.assertEqual(3, s.cell(2, 5))
+        # The options of the cell, and 3 in the column and square
+        self.assertEqual(9 + 8 + 4, change.removed)
+        self.assertIsNone(s._check_hidden_single())
+
+    def test_check_hidden_pair(self):
+        s = Sudoku()
+        # 1 and 2 are only possible in the cells (2, 0) and (2, 1) of row 2
+        s._set_options(2, 0, [1, 2, 5, 6])
+        s._set_options(2, 1, [1, 2, 7])
+        for i in range(2, Sudoku.SIZE):
+            s._set_options(2, i, [3, 4, 5, 6, 7, 8, 9])
+        change = s._check_hidden_sub_set()
+        self.assertEqual(ChangeType.HIDDEN_PAIR, change.type)
+        self.assertEqual(3, change.removed)
+        self.assertEqual({'row': 2, 'sub_set': {1, 2}, 'removed': [(2, 0, 5), (2, 0, 6), (2, 1, 7)]}, change.data)
+        self.assertEqual([1, 2], s.options(2, 0))
+        self.assertEqual([1, 2], s.options(2, 1))
+
+    def test_check_hidden_triple(self):
+        s = Sudoku()
+        # 7, 8 and 9 are only possible in the cells (3, 3), (3, 4) and (4, 3) of the middle square
+        s._set_options(3, 3, [1, 7, 8])
+        s._set_options(3, 4, [2, 8, 9])
+        s._set_options(4, 3, [3, 7, 9])
+        for r, c in [(4, 4), (4, 5), (3, 5), (5, 3), (5, 4), (5, 5)]:
+            s._set_options(r, c, [1, 2, 3, 4, 5, 6])
+        change = s._check_hidden_sub_set()
+        self.assertEqual(ChangeType.HIDDEN_TRIPLE, change.type)
+        self.assertEqual(3, change.removed)
+        self.assertEqual(
+            {'square': (3, 3), 'sub_set': {7, 8, 9}, 'removed': [(3, 3, 1), (3, 4, 2), (4, 3, 3)]},
+            change.data
+        )
+        self.assertIsNone(s._check_hidden_sub_set())
+
     def test_check_row_sub_set(self):
         s = Sudoku()
         options_in_row = [
@@ -148,7 +320,7 @@ class SudokuTestCase(TestCase):
             [1, 2, 8, 9],
         ]
         for i in range(Sudoku.SIZE):
-            s._options[2][i] = options_in_row[i]
+            s._set_options(2, i, options_in_row[i])
         change = s._check_row_sub_set()
         self.assertEqual(ChangeType.ROW_SUB_SET, change.type)
         self.assertEqual(6, change.removed)
@@ -170,7 +342,7 @@ class SudokuTestCase(TestCase):
         ]
         s.define_cell(2, 6, 8)
         for i in range(Sudoku.SIZE):
-            s._options[i][6] = options_in_column[i]
+            s._set_options(i, 6, options_in_column[i])
         change = s._check_column_sub_set()
         self.assertEqual(ChangeType.COLUMN_SUB_SET, change.type)
         self.assertEqual(4, change.removed)
@@ -192,13 +364,76 @@ class SudokuTestCase(TestCase):
         ]
         s.define_cell(3, 6, 9)
         for index, (r, c) in enumerate(s._cells_in_square(3, 6)):
-            s._options[r][c] = options_in_square[index]
+            s._set_options(r, c, options_in_square[index])
         change = s._check_square_sub_set()
         self.assertEqual(ChangeType.SQUARE_SUB_SET, change.type)
         self.assertEqual(4, change.removed)
         self.assertEqual({'square': (3, 6), 'sub_set': {4, 5, 6, 7},
                           'removed': [(3, 8, 7), (5, 6, 4), (5, 6, 6), (5, 6, 7)]}, change.data)
 
+    def test_check_x_wing(self):
+        s = Sudoku()
+        # In rows 1 and 6, 5 is only possible in columns 2 and 7
+        for r in (1, 6):
+            for c in range(Sudoku.SIZE):
+                if c not in (2, 7):
+                    s._set_options(r, c, [1, 2, 3, 4, 6, 7, 8, 9])
+        change = s._check_x_wing()
+        self.assertEqual(ChangeType.X_WING, change.type)
+        self.assertEqual(14, change.removed)
+        self.assertEqual({'value': 5, 'rows': [1, 6], 'columns': [2, 7]}, {
+            key: value for key, value in change.data.items() if key != 'removed'
+        })
+        self.assertEqual([1, 2, 3, 4, 6, 7, 8, 9], s.options(0, 2))
+        self.assertEqual([1, 2, 3, 4, 5, 6, 7, 8, 9], s.options(1, 2))
+        # Nothing changed since the last search
+        self.assertIsNone(s._check_x_wing())
+
+    def test_check_swordfish(self):
+        s = Sudoku()
+        # In rows 0, 4 and 8, 5 is only possible in two of columns 1, 4 and 7
+        for r, columns in ((0, (1, 4)), (4, (4, 7)), (8, (1, 7))):
+            for c in range(Sudoku.SIZE):
+                if c not in columns:
+                    s._set_options(r, c, [1, 2, 3, 4, 6, 7, 8, 9])
+        self.assertIsNone(s._check_x_wing())
+        change = s._check_swordfish()
+        self.assertEqual(ChangeType.SWORDFISH, change.type)
+        self.assertEqual(18, change.removed)
+        self.assertEqual([0, 4, 8], change.data['rows'])
+        self.assertEqual([1, 4, 7], change.data['columns'])
+        self.assertEqual([1, 2, 3, 4, 6, 7, 8, 9], s.options(3, 4))
+
+    def test_check_xy_wing(self):
+        s = Sudoku()
+        s._set_options(0, 0, [1, 2])
+        s._set_options(0, 5, [1, 3])
+        s._set_options(5, 0, [2, 3])
+        change = s._check_xy_wing()
+        self.assertEqual(ChangeType.XY_WING, change.type)
+        self.assertEqual(
+            {'pivot': (0, 0), 'pincers': [(0, 5), (5, 0)], 'value': 3, 'removed': [(5, 5)]},
+            change.data
+        )
+        self.assertEqual([1, 2, 4, 5, 6, 7, 8, 9], s.options(5, 5))
+
+    def test_check_simple_coloring(self):
+        s = Sudoku()
+        # 7 is linked between (0, 0) and (0, 4) in row 0, (0, 4) and (4, 4) in column 4, (4, 4) and (4, 1) in row 4
+        no_seven = [1, 2, 3, 4, 5, 6, 8, 9]
+        for c in range(Sudoku.SIZE):
+            if c not in (0, 4):
+                s._set_options(0, c, no_seven)
+            if c not in (1, 4):
+                s._set_options(4, c, no_seven)
+        for r in range(1, Sudoku.SIZE):
+            if r != 4:
+                s._set_options(r, 4, no_seven)
+        change = s._check_simple_coloring()
+        self.assertEqual(ChangeType.SIMPLE_COLORING, change.type)
+        # The cells seeing both (0, 0) and (4, 1), which have opposite colors
+        self.assertEqual({'value': 7, 'removed': [(1, 1), (2, 1), (3, 0), (5, 0)]}, change.data)
+
     def test_summary(self):
         s = Sudoku()
         s.define_cell(3, 3, 3)
@@ -208,11 +443,21 @@ class SudokuTestCase(TestCase):
             {
                 ChangeType.DEFINE: {'count': 2, 'removed': 56},
                 ChangeType.CELL_SINGLETON: {'count': 0, 'removed': 0},
+                ChangeType.HIDDEN_SINGLE: {'count': 0, 'removed': 0},
                 ChangeType.EXCLUSIVE_ROW_IN_SQUARE: {'count': 0, 'removed': 0},
                 ChangeType.EXCLUSIVE_COLUMN_IN_SQUARE: {'count': 0, 'removed': 0},
+                ChangeType.EXCLUSIVE_SQUARE_IN_ROW: {'count': 0, 'removed': 0},
+                ChangeType.EXCLUSIVE_SQUARE_IN_COLUMN: {'count': 0, 'removed': 0},
+                ChangeType.HIDDEN_PAIR: {'count': 0, 'removed': 0},
+                ChangeType.HIDDEN_TRIPLE: {'count': 0, 'removed': 0},
                 ChangeType.ROW_SUB_SET: {'count': 0, 'removed': 0},
                 ChangeType.COLUMN_SUB_SET: {'count': 0, 'removed': 0},
                 ChangeType.SQUARE_SUB_SET: {'count': 0, 'removed': 0},
+                ChangeType.X_WING: {'count': 0, 'removed': 0},
+                ChangeType.SWORDFISH: {'count': 0, 'removed': 0},
+                ChangeType.XY_WING: {'count': 0, 'removed': 0},
+                ChangeType.SIMPLE_COLORING: {'count': 0, 'removed': 0},
+                ChangeType.SEARCH: {'count': 0, 'removed': 0},
             },
             summary
         )
@@ -231,5 +476,318 @@ class SudokuTestCase(TestCase):
             s.load_grid(index)
             s.solve()
             summary = s.change_summary()
-            self.assertEqual(grids[index]['solved'], s.solved())
+            self.assertTrue(s.solved())
+            self.assertEqual(grids[index]['solved'], summary[ChangeType.SEARCH]['count'] == 0)
             self.assertEqual(grids[index]['summary'], summary)
+
+    def test_iter_steps(self):
+        for index in grids:
+            solved = Sudoku()
+            solved.load_grid(index)
+            solved.solve()
+            s = Sudoku()
+            s.load_grid(index)
+            steps = list(s.iter_steps())
+            # Stepping gives the changes of solve(), for the same work
+            self.assertEqual(solved._changes[-len(steps):], steps)
+            self.assertEqual(solved._cells_scanned, s._cells_scanned)
+            self.assertTrue(s.solved())
+            self.assertIsNone(s.next_hint())
+
+    def test_next_hint(self):
+        s = Sudoku()
+        s.load_grid(513089)
+        loaded = s.snapshot()
+        change = s.next_hint()
+        self.assertEqual(ChangeType.CELL_SINGLETON, change.type)
+        self.assertEqual(change.data['value'], s.cell(change.data['row'], change.data['column']))
+        self.assertEqual(change, s.undo())
+        self.assertEqual(loaded.cells, s.snapshot().cells)
+        # Without search, hints stop where the strategies do
+        while s.next_hint(use_search=False) is not None:
+            pass
+        self.assertFalse(s.solved())
+        self.assertEqual(ChangeType.SEARCH, s.next_hint().type)
+        self.assertTrue(s.solved())
+
+    def test_next_hint_after_undo(self):
+        # Undoing a hint gives back options, so every strategy must look again at the units which got them back
+        for grid in [g['grid'] for g in grids.values()] + [
+            '6   4  32    73  8   5            5 5   29    3 6  21  4   2  6  1        7    83',
+            '    27  81  4  32 3  6 8   24     9  18  5 6   78      2     5   4   2 6         ',
+        ]:
+            s = Sudoku()
+            s.load_grid_string(grid)
+            change = s.next_hint()
+            while change is not None:
+                self.assertEqual(change, s.undo())
+                self.assertEqual(change, s.next_hint())
+                change = s.next_hint()
+
+    def test_solve_without_search(self):
+        for index in grids:
+            s = Sudoku()
+            s.load_grid(index)
+            s.solve(use_search=False)
+            self.assertEqual(grids[index]['solved'], s.solved())
+            self.assertEqual(0, s.change_summary()[ChangeType.SEARCH]['count'])
+
+    def test_solve_with_search(self):
+        s = Sudoku()
+        s.load_grid(513089)
+        s.solve()
+        change = s._changes[-1]
+        self.assertEqual(ChangeType.SEARCH, change.type)
+        self.assertEqual({'nodes': 6}, change.data)
+        self.assertEqual([], s.options(4, 4))
+        # Every option of the grid has been removed once the grid is complete
+        self.assertEqual(729, sum(c.removed for c in s._changes))
+        for unit in UNITS:
+            self.assertEqual(set(Sudoku.VALUE_RANGE), {s._cell[index] for index in unit})
+
+    def test_profiling(self):
+        s = Sudoku()
+        self.assertEqual({}, s.profile_summary())
+        s.enable_profiling()
+        s.load_grid(327085)
+        s.solve()
+        profile = s.profile_summary()
+        summary = s.change_summary()
+        self.assertEqual(set(PROFILED_METHODS), set(profile))
+        self.assertEqual(summary[ChangeType.CELL_SINGLETON]['count'], profile['_check_cell_singleton']['hits'])
+        self.assertEqual(summary[ChangeType.ROW_SUB_SET]['count'], profile['_check_row_sub_set']['hits'])
+        # Every cell defined by solve() went through _remove_options, the clues were defined at once by define_cells()
+        solved_cells = 81 - summary[ChangeType.DEFINE]['count']
+        self.assertEqual(solved_cells, profile['_remove_options']['calls'])
+        self.assertEqual(solved_cells * 21, profile['_remove_options']['cells'])
+        for stats in profile.values():
+            self.assertLessEqual(stats['hits'], stats['calls'])
+            self.assertGreaterEqual(stats['time'], 0.0)
+        self.assertEqual(summary[ChangeType.HIDDEN_SINGLE]['count'], profile['_check_hidden_single']['hits'])
+        self.assertGreater(profile['_check_hidden_single']['calls'], profile['_check_hidden_single']['hits'])
+        self.assertGreater(profile['_check_hidden_single']['cells'], 0)
+        # The grid is solved before the most expensive strategies are needed
+        self.assertEqual(0, profile['_check_row_sub_set']['calls'])
+        # Profiling does not change the solve
+        self.assertEqual(grids[327085]['summary'], summary)
+
+    def test_snapshot_restore(self):
+        s = Sudoku()
+        s.load_grid(513089)
+        snapshot = s.snapshot()
+        self.assertIsInstance(snapshot.cells, tuple)
+        self.assertIsInstance(snapshot.candidates, bytes)
+        self.assertEqual(162, len(snapshot.candidates))
+        changes = s._changes
+        s.solve()
+        self.assertTrue(s.solved())
+        s.restore(snapshot)
+        self.assertFalse(s.solved())
+        self.assertEqual(changes, s._changes)
+        self.assertEqual(snapshot, s.snapshot())
+        # Solving again from the snapshot gives the same result
+        s.solve()
+        self.assertEqual(grids[513089]['summary'], s.change_summary())
+
+    def test_snapshot_branches(self):
+        s = Sudoku()
+        s.load_grid(327085)
+        snapshot = s.snapshot()
+        branch = Sudoku.from_snapshot(snapshot)
+        branch.define_cell(0, 0, 2)
+        self.assertEqual(None, s.cell(0, 0))
+        self.assertEqual(2, branch.cell(0, 0))
+        # Branches share the history recorded before the snapshot
+        self.assertEqual(29, len(branch._changes))
+        self.assertIs(snapshot.history, branch._history[1])
+        s.define_cell(0, 0, 6)
+        s.restore(branch.snapshot())
+        self.assertEqual(2, s.cell(0, 0))
+        self.assertEqual(branch._changes, s._changes)
+
+    def test_undo(self):
+        s = Sudoku()
+        self.assertIsNone(s.undo())
+        s.load_grid(513089)
+        loaded = s.snapshot()
+        s.solve()
+        self.assertTrue(s.solved())
+        # Undo the search, then the logical changes one at a time, down to an empty grid
+        self.assertEqual(ChangeType.SEARCH, s.undo().type)
+        self.assertFalse(s.solved())
+        while s.undo() is not None:
+            pass
+        self.assertEqual(' ' * 81, s.grid_string())
+        self.assertEqual([Sudoku.ALL_OPTIONS] * 81, list(s._candidates))
+        self.assertEqual([], s._changes)
+        self.assertEqual(0, len(s._trail))
+        # Solving again gives the same result
+        s.load_grid(513089)
+        self.assertEqual(loaded.cells, s.snapshot().cells)
+        self.assertEqual(loaded.candidates, s.snapshot().candidates)
+        s.solve()
+        self.assertEqual(grids[513089]['summary'], s.change_summary())
+
+    def test_undo_to(self):
+        s = Sudoku()
+        s.load_grid(327085)
+        mark = s.mark()
+        loaded = s.snapshot()
+        s.solve()
+        s.undo_to(mark)
+        self.assertEqual(loaded.cells, s.snapshot().cells)
+        self.assertEqual(loaded.candidates, s.snapshot().candidates)
+        self.assertEqual(loaded.history, s._history)
+        # The same object explores another branch from the mark
+        s.define_cell(0, 0, 2)
+        self.assertEqual(2, s.cell(0, 0))
+        s.undo_to(mark)
+        self.assertEqual(None, s.cell(0, 0))
+        s.solve()
+        self.assertEqual(grids[327085]['summary'], s.change_summary())
+        # A mark taken further down the history cannot be reached by undoing
+        solved = s.mark()
+        s.undo_to(mark)
+        with self.assertRaises(ValueError):
+            s.undo_to(solved)
+
+    def test_undo_to_other_branch(self):
+        for history in (True, False):
+            s = Sudoku(history=history)
+            s.load_grid(327085)
+            base = s.mark()
+            s.define_cell(0, 0, 2)
+            branch = s.mark()
+            s.undo_to(base)
+            s.define_cell(0, 0, 6)
+            s.solve()
+            # The mark of the undone branch is rejected, even though the trail is now longer
+            self.assertGreater(len(s._trail), branch.trail)
+            with self.assertRaises(ValueError):
+                s.undo_to(branch)
+            self.assertEqual(6, s.cell(0, 0))
+            self.assertTrue(s.solved())
+            s.undo_to(base)
+            self.assertIsNone(s.cell(0, 0))
+            self.assertEqual(28, len(s._changes))
+
+    def test_without_history(self):
+        for index in grids:
+            expected = Sudoku()
+            expected.load_grid(index)
+            expected.solve()
+            s = Sudoku(history=False)
+            s.load_grid(index)
+            s.solve()
+            self.assertIsNone(s._history)
+            self.assertEqual(expected.grid_string(), s.grid_string())
+            self.assertEqual(grids[index]['summary'], s.change_summary())
+            self.assertEqual([(c.type, None, c.removed) for c in expected._changes], s._changes)
+            # Undo walks back the same states, giving changes without their data
+            for _ in range(10):
+                change = expected.undo()
+                self.assertEqual(Change(change.type, None, change.removed), s.undo())
+                self.assertEqual(expected.snapshot().candidates, s.snapshot().candidates)
+            self.assertEqual(1, s.count_solutions())
+
+        s = Sudoku(history=False)
+        self.assertIsNone(s.undo())
+        s.load_grid(327085)
+        mark = s.mark()
+        snapshot = s.snapshot()
+        self.assertIsInstance(snapshot.history, bytes)
+        s.solve()
+        s.undo_to(mark)
+        self.assertEqual(snapshot.cells, s.snapshot().cells)
+        self.assertEqual(snapshot.candidates, s.snapshot().candidates)
+        self.assertEqual(snapshot.history, s.snapshot().history)
+        s.solve()
+        solved = s.mark()
+        s.undo_to(mark)
+        with self.assertRaises(ValueError):
+            s.undo_to(solved)
+        # Branches keep the change log of the snapshot
+        branch = Sudoku.from_snapshot(snapshot)
+        self.assertIsNone(branch._history)
+        self.assertEqual(s._changes, branch._changes)
+        branch.solve()
+        self.assertEqual(grids[327085]['summary'], branch.change_summary())
+
+    def test_count_solutions(self):
+        for index in grids:
+            s = Sudoku()
+            s.load_grid(index)
+            snapshot = s.snapshot()
+            self.assertEqual(1, s.count_solutions())
+            # The grid is left as it was
+            self.assertEqual(snapshot.cells, s.snapshot().cells)
+            self.assertEqual(snapshot.candidates, s.snapshot().candidates)
+            self.assertEqual(snapshot.history, s._history)
+            self.assertEqual(snapshot, s.snapshot())
+            # Solving afterwards records the same changes as a fresh solve
+            s.solve()
+            fresh = Sudoku()
+            fresh.load_grid(index)
+            fresh.solve()
+            self.assertEqual(fresh._changes, s._changes)
+        # Grid where a claiming deduction comes back once count_solutions() undoes its work
+        grid = '   4  32  51   79 7          91 4    3 29   4   3   8       51 8  92      4 6    '
+        s = Sudoku()
+        s.load_grid_string(grid)
+        self.assertEqual(1, s.count_solutions())
+        s.solve()
+        fresh = Sudoku()
+        fresh.load_grid_string(grid)
+        fresh.solve()
+        self.assertEqual(fresh._changes, s._changes)
+        s = Sudoku()
+        s.load_grid_string(grids[327085]['grid'][:-9] + ' ' * 9)
+        self.assertEqual(2, s.count_solutions())
+        self.assertEqual(2, s.count_solutions(limit=2))
+        self.assertGreater(s.count_solutions(limit=100), 2)
+        with self.assertRaises(ValueError):
+            s.count_solutions(limit=0)
+
+    def test_size(self):
+        s = Sudoku(4)
+        self.assertEqual(16, len(s._cell))
+        self.assertEqual([1, 2, 3, 4], s.options(2, 3))
+        s.load_grid_string('12  34    1 2  3')
+        self.assertEqual(
+            "+-----+-----+\n"
+            "| 1 2 |     |\n"
+            "| 3 4 |     |\n"
+            "+-----+-----+\n"
+            "|     | 1   |\n"
+            "| 2   |   3 |\n"
+            "+-----+-----+\n",
+            str(s))
+        s.solve()
+        self.assertTrue(s.solved())
+        self.assertEqual('1234342143122143', s.grid_string())
+        with self.assertRaises(ValueError) as e:
+            Sudoku(4).load_grid_string('5' + ' ' * 15)
+        self.assertEqual('Value out of range', e.exception.args[0])
+        with self.assertRaises(ValueError) as e:
+            Sudoku(4).load_grid_string(grids[327085]['grid'])
+        self.assertEqual('Grid must have 16 cells', e.exception.args[0])
+        for size in (8, 36):
+            with self.assertRaises(ValueError):
+                Sudoku(size)
+
+    def test_size_16(self):
+        # A complete grid built by shifting the values of each row, then emptied one cell in three
+        solution = ''.join('123456789ABCDEFG'[(row * 4 + row // 4 + column) % 16] for row in range(16)
+                           for column in range(16))
+        grid = ''.join(' ' if index % 3 == 0 else value for index, value in enumerate(solution))
+        s = Sudoku(16)
+        s.load_grid_string(grid)
+        self.assertEqual(grid, s.grid_string())
+        self.assertEqual(11, s.cell(0, 10))
+        self.assertEqual(1, s.count_solutions())
+        s.solve()
+        self.assertTrue(s.solved())
+        self.assertEqual(solution, s.grid_string())
+        restored = Sudoku.from_snapshot(s.snapshot())
+        self.assertEqual(16, restored.SIZE)
+        self.assertEqual(solution, restored.grid_string())
@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from tables import get_tables, CELLS, ROW_OF, COLUMN_OF, SQUARE_OF, ROWS, COLUMNS, SQUARES, UNITS, UNITS_OF, PEERS, \
+    SQUARE_ORIGIN, SQUARE_ROWS, SQUARE_COLUMNS
+
+
+class TablesTestCase(TestCase):
+    def test_cell_coordinates(self):
+        index = 4 * 9 + 6
+        self.assertEqual(4, ROW_OF[index])
+        self.assertEqual(6, COLUMN_OF[index])
+        self.assertEqual(5, SQUARE_OF[index])
+        self.assertEqual((3, 6), SQUARE_ORIGIN[5])
+
+    def test_units(self):
+        self.assertEqual(27, len(UNITS))
+        for unit in UNITS:
+            self.assertEqual(9, len(unit))
+        self.assertEqual(tuple(range(9, 18)), ROWS[1])
+        self.assertEqual(tuple(range(2, 81, 9)), COLUMNS[2])
+        self.assertEqual((30, 31, 32, 39, 40, 41, 48, 49, 50), SQUARES[4])
+        self.assertEqual(((30, 31, 32), (39, 40, 41), (48, 49, 50)), SQUARE_ROWS[4])
+        self.assertEqual(((30, 39, 48), (31, 40, 49), (32, 41, 50)), SQUARE_COLUMNS[4])
+
+    def test_units_of(self):
+        for index in CELLS:
+            for unit in UNITS_OF[index]:
+                self.assertIn(index, UNITS[unit])
+        self.assertEqual((4, 15, 23), UNITS_OF[4 * 9 + 6])
+
+    def test_peers(self):
+        for index in CELLS:
+            self.assertEqual(20, len(PEERS[index]))
+            self.assertEqual(20, len(set(PEERS[index])))
+            self.assertNotIn(index, PEERS[index])
+            expected = set()
+            for unit in UNITS_OF[index]:
+                expected.update(UNITS[unit])
+            expected.discard(index)
+            self.assertEqual(expected, set(PEERS[index]))
+
+    def test_get_tables(self):
+        tables = get_tables(9)
+        self.assertEqual(UNITS, tables.units)
+        self.assertIs(tables, get_tables(9))
+        tables = get_tables(16)
+        self.assertEqual(4, tables.block)
+        self.assertEqual(256, len(tables.cells))
+        self.assertEqual(48, len(tables.units))
+        index = 5 * 16 + 9
+        self.assertEqual((5, 16 + 9, 32 + 6), tables.units_of[index])
+        self.assertEqual((4, 8), tables.square_origin[6])
+        for index in tables.cells:
+            self.assertEqual(15 + 15 + 9, len(tables.peers[index]))
+        for size in (1, 8, 10):
+            with self.assertRaises(ValueError):
+                get_tables(size)
@@ -1,7 +1,7 @@
 from collections import namedtuple
 from unittest import TestCase
 
-from utils import exclusive_sub_list
+from utils import exclusive_sub_list, is_single, popcount, value_bit, bit_values
 
 
 TestData = namedtuple('TestData', ['input', 'result'])
@@ -15,6 +15,17 @@ class ExclusiveSubListTestCase(TestCase):
                 {'containers': [[1, 2, 4], [3, 4, 7], [3, 4, 7], [1, 2, 3, 4, 7], [3, 7]]},
                 {'set': {3, 4, 7}, 'indexes': (1, 2, 4)}
             ),
+            # Exclusive sub-list larger than half of the list, found through its complement
+            TestData(
+                {'containers': [[1, 6, 7], [2, 8, 9], [3, 6, 9], [4, 7, 8], [1, 2, 3], [2, 3, 4], [3, 4, 5], [1, 4, 5],
+                                [1, 2, 5]]},
+                {'set': {1, 2, 3, 4, 5}, 'indexes': (4, 5, 6, 7, 8)}
+            ),
+            # More distinct elements than containers
+            TestData(
+                {'containers': [[1, 2], [1, 3], [2, 3, 4], [1, 4], [5, 6]]},
+                {'set': {1, 2, 3, 4}, 'indexes': (0, 1, 2, 3)}
+            ),
         ]
         for x in data:
             sub_set, indexes = exclusive_sub_list(x.input['containers'])
@@ -31,3 +42,25 @@ class ExclusiveSubListTestCase(TestCase):
     def test_short_member_lists_are_rejected(self):
         with self.assertRaises(ValueError):
             exclusive_sub_list([[1, 2, 4], [2, 3, 4]])
+
+
+class BitMaskTestCase(TestCase):
+    def test_popcount(self):
+        self.assertEqual(0, popcount(0))
+        self.assertEqual(1, popcount(0b100000000))
+        self.assertEqual(9, popcount(0b111111111))
+        self.assertEqual(3, popcount(0b100100001))
+
+    def test_is_single(self):
+        self.assertFalse(is_single(0))
+        self.assertTrue(is_single(0b100000000))
+        self.assertFalse(is_single(0b100100001))
+
+    def test_value_bit(self):
+        self.assertEqual(1, value_bit(1))
+        self.assertEqual(0b100000000, value_bit(9))
+
+    def test_bit_values(self):
+        self.assertEqual([], bit_values(0))
+        self.assertEqual([1, 4, 9], bit_values(0b100001001))
+        self.assertEqual([x for x in range(1, 10)], bit_values(0b111111111))
@@ -0,0 +1,50 @@
+from importlib.util import find_spec
+from unittest import TestCase, skipUnless
+
+from data import grids
+from sudoku import Sudoku
+from tests.helpers import solution
+
+if find_spec('numpy') is not None:
+    import numpy as np
+    from vectorized import grids_to_values, values_to_grid, candidates, propagate, solve_batch
+
+
+@skipUnless(find_spec('numpy') is not None, 'NumPy is not installed')
+class VectorizedTestCase(TestCase):
+    def test_grids_to_values(self):
+        grid = grids[327085]['grid']
+        values = grids_to_values([grid, grid])
+        self.assertEqual((2, 81), values.shape)
+        self.assertEqual(0, values[0, 0])
+        self.assertEqual(1, values[0, 2])
+        self.assertEqual(grid, values_to_grid(values[1]))
+        with self.assertRaises(ValueError):
+            grids_to_values(['123'])
+        with self.assertRaises(ValueError):
+            grids_to_values(['a' * 81])
+
+    def test_candidates(self):
+        grid = grids[327085]['grid']
+        masks = candidates(grids_to_values([grid]))
+        s = Sudoku()
+        s.load_grid_string(grid)
+        self.assertEqual(np.uint16, masks.dtype)
+        self.assertEqual(list(s._candidates), masks[0].tolist())
+
+    def test_propagate(self):
+        indexes = [125602, 513089]
+        values, failed = propagate(grids_to_values([grids[index]['grid'] for index in indexes]))
+        self.assertEqual([False, False], failed.tolist())
+        # Solved by singles only
+        self.assertEqual(solution(grids[125602]['grid']), values_to_grid(values[0]))
+        self.assertIn(0, values[1].tolist())
+
+    def test_propagate_contradiction(self):
+        values, failed = propagate(grids_to_values(['11' + ' ' * 79]))
+        self.assertEqual([True], failed.tolist())
+
+    def test_solve_batch(self):
+        batch = [grids[index]['grid'] for index in grids] + ['11' + ' ' * 79]
+        self.assertEqual([solution(grid) for grid in batch[:-1]] + [None], solve_batch(batch))
+        self.assertEqual([], solve_batch([]))
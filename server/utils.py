@@ -1,29 +1,133 @@
 from itertools import combinations
-from typing import List
+from typing import List, Optional, Tuple
 
 MIN_NB_OF_CONTAINERS = 3
 
 
+def popcount(mask: int) -> int:
+    """Returns the number of bits set in a candidates' mask."""
+    return bin(mask).count('1')
+
+
+def is_single(mask: int) -> bool:
+    """Returns whether a candidates' mask has exactly one bit set (False for an empty mask)."""
+    return mask != 0 and mask & (mask - 1) == 0
+
+
+def value_bit(value: int) -> int:
+    """Returns the candidates' mask bit standing for a value (1 for value 1, 2 for value 2, 4 for value 3...)."""
+    return 1 << (value - 1)
+
+
+def bit_values(mask: int) -> List[int]:
+    """Returns the sorted list of values whose bit is set in a candidates' mask."""
+    values = []
+    value = 1
+    while mask:
+        if mask & 1:
+            values.append(value)
+        mask >>= 1
+        value += 1
+    return values
+
+
+def _naked_sub_list(masks: List[int], size: int) -> Optional[Tuple[int, ...]]:
+    """Returns the first indexes (in combinations' order) of size masks whose union has exactly size bits."""
+    chosen = []
+
+    def extend(start, union):
+        for pos in range(start, len(masks) - (size - len(chosen)) + 1):
+            pos_union = union | masks[pos]
+            # Prune as soon as the union has too many bits, as it can only grow
+            if popcount(pos_union) <= size:
+                chosen.append(pos)
+                if len(chosen) == size:
+                    if popcount(pos_union) == size:
+                        return tuple(chosen)
+                elif extend(pos + 1, pos_union) is not None:
+                    return tuple(chosen)
+                chosen.pop()
+        return None
+
+    return extend(0, 0)
+
+
+def _hidden_sub_list(masks: List[int], size: int) -> Optional[Tuple[int, ...]]:
+    """Same as _naked_sub_list, for masks whose union has exactly len(masks) bits.
+
+    The complement of a naked sub-list of size k is a hidden sub-list of size n - k: n - k values whose positions
+    are all in n - k containers. Searching hidden sub-lists instead of naked ones keeps combinations small when
+    size is more than half the number of masks."""
+    nb_of_masks = len(masks)
+    hidden_size = nb_of_masks - size
+    # Positions of each value, as a mask of container indexes
+    positions = []
+    for bit_pos in range(nb_of_masks):
+        value_positions = 0
+        for pos, mask in enumerate(masks):
+            if mask >> bit_pos & 1:
+                value_positions |= 1 << pos
+        positions.append(value_positions)
+
+    best = None
+
+    def extend(start, nb_of_values, hidden_positions):
+        nonlocal best
+        if nb_of_values == hidden_size:
+            # Complete the hidden positions up to hidden_size containers, then check the other containers
+            free = [pos for pos in range(nb_of_masks) if not hidden_positions >> pos & 1]
+            for extra in combinations(free, hidden_size - popcount(hidden_positions)):
+                sub_list = tuple(pos for pos in free if pos not in extra)
+                union = 0
+                for pos in sub_list:
+                    union |= masks[pos]
+                if popcount(union) == size and (best is None or sub_list < best):
+                    best = sub_list
+            return
+        for value in range(start, nb_of_masks - (hidden_size - nb_of_values) + 1):
+            value_union = hidden_positions | positions[value]
+            # Prune as soon as the values have too many positions, as they can only get more
+            if popcount(value_union) <= hidden_size:
+                extend(value + 1, nb_of_values + 1, value_union)
+
+    extend(0, 0, 0)
+    return best
+
+
 def exclusive_sub_list(containers_list: List[List[any]]):
     """Returns an exclusive sub-list from a list of containers, or None if no exclusive sub-list is found.
 
     An exclusive sub-list is found when the set formed with the content of containers in the sub-list
-    has the same length as the sub-list (as many elements in the set as elements in the sub-list)."""
+    has the same length as the sub-list (as many elements in the set as elements in the sub-list).
+    The smallest exclusive sub-list is returned, the first one in combinations' order for a given size."""
     if len(containers_list) < MIN_NB_OF_CONTAINERS:
         raise ValueError("Containers' list must contain at least 3 elements")
 
-    # Iterate through all possible sub-lists
-    container_indexes = [x for x in range(len(containers_list))]
+    # Turn each container into a mask, with one bit per distinct element
+    element_bits = {}
+    masks = []
+    for container in containers_list:
+        mask = 0
+        for element in container:
+            bit = element_bits.get(element)
+            if bit is None:
+                bit = element_bits[element] = 1 << len(element_bits)
+            mask |= bit
+        masks.append(mask)
+
+    # When the containers hold as many distinct elements as there are containers, sub-lists larger than half of the
+    # list are found through their complement
+    complete = len(element_bits) == len(masks)
     for sub_list_size in range(2, len(containers_list)):
-        for sub_list_indexes in combinations(container_indexes, sub_list_size):
+        if complete and sub_list_size > len(masks) // 2:
+            sub_list_indexes = _hidden_sub_list(masks, sub_list_size)
+        else:
+            sub_list_indexes = _naked_sub_list(masks, sub_list_size)
+        if sub_list_indexes is not None:
             # Create the set with content from containers in sub-list
             sub_list_content_set = set()
-            for container in [containers_list[pos] for pos in sub_list_indexes]:
-                for i in range(len(container)):
-                    sub_list_content_set.add(container[i])
-
-            if len(sub_list_content_set) == sub_list_size:
-                # If sub-list is exclusive, return it
-                return sub_list_content_set, sub_list_indexes
+            for pos in sub_list_indexes:
+                for element in containers_list[pos]:
+                    sub_list_content_set.add(element)
+            return sub_list_content_set, sub_list_indexes
     return None
-
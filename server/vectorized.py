@@ -0,0 +1,122 @@
+"""Solving of thousands of grids at once with NumPy array operations.
+
+N grids are held as an (N, 81) array of values (0 for an empty cell) and an (N, 81) uint16 array of candidates'
+masks. The eliminations of Sudoku._remove_options, naked singles (Sudoku._check_cell_singleton) and hidden singles
+are applied to the whole batch at each step. Grids which singles alone do not solve are handed to the per-grid
+Sudoku path. Requires NumPy."""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sudoku import Sudoku
+from tables import UNITS, UNITS_OF
+
+ALL_OPTIONS = Sudoku.ALL_OPTIONS
+
+_UNITS = np.array(UNITS, dtype=np.intp)                       # (27, 9) cell indexes of each unit
+_UNITS_OF = np.array(UNITS_OF, dtype=np.intp)                 # (81, 3) unit indexes of each cell
+_BITS = np.array([1 << k for k in range(9)], dtype=np.uint16)  # bit of each value - 1
+_OPTION_COUNT = np.array([bin(mask).count('1') for mask in range(ALL_OPTIONS + 1)], dtype=np.uint8)
+# Value of single-bit masks (0 for other masks)
+_SINGLE_VALUE = np.zeros(ALL_OPTIONS + 1, dtype=np.uint8)
+_SINGLE_VALUE[_BITS] = np.arange(1, 10, dtype=np.uint8)
+
+
+def grids_to_values(grids: Sequence[str]) -> np.ndarray:
+    """Turns grids in the format of Sudoku.load_grid_string() into an (N, 81) array of values."""
+    if any(len(grid) != 81 for grid in grids):
+        raise ValueError('Grid must have 81 cells')
+    data = np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8).reshape(len(grids), 81)
+    values = data.astype(np.int16) - ord('0')
+    values[data == ord(' ')] = 0
+    if ((values < 0) | (values > 9)).any():
+        raise ValueError('Value out of range')
+    return values.astype(np.uint8)
+
+
+def values_to_grid(values: np.ndarray) -> str:
+    """Turns one row of a values' array back into an 81-character grid."""
+    return ''.join(' ' if value == 0 else str(value) for value in values.tolist())
+
+
+def candidates(values: np.ndarray) -> np.ndarray:
+    """Returns the (N, 81) candidates' masks left by the defined values: no option for defined cells, and for the
+    others every value not defined in their row, column and square."""
+    bits = np.where(values > 0, np.left_shift(1, values.astype(np.uint16) - 1), 0).astype(np.uint16)
+    unit_values = np.bitwise_or.reduce(bits[:, _UNITS], axis=2)                 # (N, 27)
+    peer_values = np.bitwise_or.reduce(unit_values[:, _UNITS_OF], axis=2)       # (N, 81)
+    return np.where(values == 0, ALL_OPTIONS & ~peer_values, 0).astype(np.uint16)
+
+
+def _hidden_singles(masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds values possible in a single cell of a unit. Returns grid, cell and value arrays of the assignments."""
+    unit_masks = masks[:, _UNITS]                                                # (N, 27, 9)
+    has_value = (unit_masks[..., np.newaxis] & _BITS) != 0                      # (N, 27, 9 cells, 9 values)
+    single = has_value.sum(axis=2) == 1                                         # (N, 27, 9 values)
+    grid, unit, value = np.nonzero(single)
+    position = has_value[grid, unit, :, value].argmax(axis=1)
+    return grid, _UNITS[unit, position], value.astype(np.uint8) + 1
+
+
+def propagate(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Applies naked and hidden singles to every grid until none is left.
+
+    Returns the updated values, and a boolean array flagging grids found contradictory (an empty cell without any
+    option, or a value defined twice in a unit)."""
+    values = values.copy()
+    active = np.arange(len(values))
+    failed = np.zeros(len(values), dtype=bool)
+    while len(active):
+        current = values[active]
+        masks = candidates(current)
+        empty = current == 0
+        # Contradictions: an empty cell without option
+        stuck = (empty & (masks == 0)).any(axis=1)
+        failed[active[stuck]] = True
+
+        changed = np.zeros(len(active), dtype=bool)
+        # Naked singles
+        single = empty & (_OPTION_COUNT[masks] == 1) & ~stuck[:, np.newaxis]
+        current[single] = _SINGLE_VALUE[masks[single]]
+        changed |= single.any(axis=1)
+        # Hidden singles, in cells which are not naked singles
+        grid, cell, value = _hidden_singles(masks)
+        keep = ~stuck[grid] & (current[grid, cell] == 0)
+        current[grid[keep], cell[keep]] = value[keep]
+        changed[grid[keep]] = True
+
+        values[active] = current
+        active = active[changed & ~stuck]
+    # Values defined twice in a unit (from the input, or from conflicting singles)
+    bits = np.where(values > 0, np.left_shift(1, values.astype(np.uint16) - 1), 0).astype(np.uint16)
+    unit_bits = bits[:, _UNITS]
+    counts = _OPTION_COUNT[np.bitwise_or.reduce(unit_bits, axis=2)]
+    filled = (unit_bits > 0).sum(axis=2)
+    failed |= (counts != filled).any(axis=1)
+    return values, failed
+
+
+def solve_batch(grids: Sequence[str]) -> List[Optional[str]]:
+    """Solves grids in the format of Sudoku.load_grid_string().
+
+    Returns the solution of each grid, or None for a grid without solution. Grids left incomplete by singles are
+    solved by Sudoku, starting from the cells found by the batch."""
+    if not grids:
+        return []
+    values, failed = propagate(grids_to_values(grids))
+    complete = (values != 0).all(axis=1)
+    solutions = []
+    for i, grid in enumerate(grids):
+        if complete[i] and not failed[i]:
+            solutions.append(values_to_grid(values[i]))
+            continue
+        # Back to the per-grid path, from the original grid when the batch found a contradiction
+        s = Sudoku(history=False)
+        try:
+            s.load_grid_string(grid if failed[i] else values_to_grid(values[i]))
+        except ValueError:
+            solutions.append(None)
+            continue
+        s.solve()
+        solutions.append(s.grid_string() if s.solved() else None)
+    return solutions